@@ -64,6 +64,7 @@ from webpage_to_md.http_client import (
 )
 from webpage_to_md.extractors import (
     DOCS_PRESETS,
+    ArticleScanner,
     ImageURLCollector,
     detect_docs_framework,
     extract_h1,
@@ -76,7 +77,6 @@ from webpage_to_md.extractors import (
     extract_wechat_title,
     get_available_presets,
     get_strip_selectors,
-    html_text_len,
     is_wechat_article_html,
     is_wechat_article_url,
     is_wechat_async_article,
@@ -87,6 +87,7 @@ from webpage_to_md.extractors import (
     wechat_async_to_markdown,
 )
 from webpage_to_md.images import (
+    _DEFAULT_IMAGE_WORKERS,
     _DEFAULT_MAX_IMAGE_BYTES,
     batch_download_images,
     download_images,
@@ -384,10 +385,15 @@ def _clone_session(session: requests.Session) -> requests.Session:
     requests.Session 不是线程安全的（连接池、cookie jar、默认 header 字典
     均无内部锁），并发 worker 共享同一实例可能导致连接池状态异常或 header
     交叉污染。通过为每个 worker 克隆一个独立 Session 来规避。
+
+    克隆挂载原 Session 的 adapter（urllib3 连接池自身线程安全），
+    各页面继续复用同一连接池，不必为每个 URL 重新建立 TCP/TLS 连接。
     """
     new = requests.Session()
     new.headers.update(session.headers)
     new.cookies.update(session.cookies)
+    for prefix, adapter in session.adapters.items():
+        new.mount(prefix, adapter)
     return new
 
 
@@ -628,12 +634,17 @@ def _batch_main(args: argparse.Namespace) -> int:
         short_url = url if len(url) <= 50 else url[:47] + "..."
         print(f"[{current}/{total}] 处理中：{short_url}")
 
-    # 合并模式：在抓取开始前提前检查输出文件是否已存在，
+    # 合并模式：输出路径与同名 assets 目录只推导一次，后续图片下载与输出阶段复用。
+    # 在抓取开始前提前检查输出文件是否已存在，
     # 避免抓取全部页面和下载图片后才发现冲突，浪费抓取配额和带宽。
+    merge_output_file = ""
+    merge_assets_dir = ""
     if args.merge:
-        pre_output_file = auto_wrap_output_dir(args.merge_output or "merged.md")
-        if os.path.exists(pre_output_file) and not args.overwrite:
-            print(f"文件已存在：{pre_output_file}（如需覆盖请加 --overwrite）", file=sys.stderr)
+        # 自动创建同名上级目录（如果用户未指定目录）
+        merge_output_file = auto_wrap_output_dir(args.merge_output or "merged.md")
+        merge_assets_dir = os.path.splitext(merge_output_file)[0] + ".assets"
+        if os.path.exists(merge_output_file) and not args.overwrite:
+            print(f"文件已存在：{merge_output_file}（如需覆盖请加 --overwrite）", file=sys.stderr)
             return EXIT_FILE_EXISTS
 
     # 执行批量处理
@@ -679,11 +690,8 @@ def _batch_main(args: argparse.Namespace) -> int:
         if unique_images > 0:
             # 确定 assets 目录
             if args.merge:
-                output_file = args.merge_output or "merged.md"
-                # 自动创建同名上级目录（如果用户未指定目录）
-                output_file = auto_wrap_output_dir(output_file)
-                assets_dir = os.path.splitext(output_file)[0] + ".assets"
-                md_dir = os.path.dirname(output_file) or "."
+                assets_dir = merge_assets_dir
+                md_dir = os.path.dirname(merge_output_file) or "."
             else:
                 assets_dir = os.path.join(args.output_dir, "assets")
                 md_dir = args.output_dir
@@ -706,6 +714,7 @@ def _batch_main(args: argparse.Namespace) -> int:
                     progress_callback=img_progress,
                     redact_urls=args.redact_url,
                     max_image_bytes=args.max_image_bytes,
+                    workers=args.img_workers,
                 )
             except Exception as e:
                 print(f"\n错误：图片下载失败：{e}", file=sys.stderr)
@@ -726,9 +735,7 @@ def _batch_main(args: argparse.Namespace) -> int:
     # 输出结果
     if args.merge:
         # 合并输出模式
-        output_file = args.merge_output or "merged.md"
-        # 自动创建同名上级目录（如果用户未指定目录）
-        output_file = auto_wrap_output_dir(output_file)
+        output_file = merge_output_file
         
         # 确保输出目录存在
         output_dir = os.path.dirname(output_file)
@@ -766,7 +773,7 @@ def _batch_main(args: argparse.Namespace) -> int:
             else:
                 print(f"📌 锚点冲突：{anchor_stats.collision_count} 个已自动修复（使用 --warn-anchor-collisions 查看详情）")
         if url_to_local:
-            assets_dir = os.path.splitext(output_file)[0] + ".assets"
+            assets_dir = merge_assets_dir
             # 统计图片引用情况（非破坏性：只报告不删除）
             if os.path.isdir(assets_dir):
                 # 统计实际文件数
@@ -795,7 +802,7 @@ def _batch_main(args: argparse.Namespace) -> int:
             os.makedirs(split_dir, exist_ok=True)
             
             # 确定共享的 assets 目录（使用合并版本的 assets）
-            shared_assets = os.path.splitext(output_file)[0] + ".assets" if url_to_local else None
+            shared_assets = merge_assets_dir if url_to_local else None
             
             # 生成分文件
             saved_files = batch_save_individual(
@@ -1067,6 +1074,12 @@ urls.txt 文件格式：
         default=_DEFAULT_MAX_IMAGE_BYTES,
         help="单张图片最大允许字节数（默认 25MB；设为 0 表示不限制）",
     )
+    ap.add_argument(
+        "--img-workers",
+        type=int,
+        default=_DEFAULT_IMAGE_WORKERS,
+        help=f"图片并发下载线程数（默认 {_DEFAULT_IMAGE_WORKERS}）",
+    )
     ap.add_argument(
         "--redact-url",
         dest="redact_url",
@@ -1177,9 +1190,11 @@ urls.txt 文件格式：
     
     args = ap.parse_args(argv)
 
-    # 校验 --max-workers
+    # 校验 --max-workers / --img-workers
     if args.max_workers is not None and args.max_workers < 1:
         ap.error("--max-workers 必须为正整数")
+    if args.img_workers is not None and args.img_workers < 1:
+        ap.error("--img-workers 必须为正整数")
 
     # ========== 列出预设 ==========
     if args.list_presets:
@@ -1375,6 +1390,7 @@ urls.txt 文件格式：
                 page_url=url,
                 redact_urls=args.redact_url,
                 max_image_bytes=args.max_image_bytes,
+                workers=args.img_workers,
             )
         except Exception as e:
             print(f"错误：图片下载失败：{e}", file=sys.stderr)
@@ -1514,7 +1530,11 @@ urls.txt 文件格式：
                 if strip_stats.elements_removed > 0:
                     print(f"已移除 {strip_stats.elements_removed} 个导航元素")
 
-            if args.spa_warn_len and html_text_len(article_html) < args.spa_warn_len:
+            # 正文长度、图片 URL 与首个 <h1> 由同一次解析得到
+            scanner = ArticleScanner(base_url=url)
+            scanner.feed(article_html)
+
+            if args.spa_warn_len and scanner.text_len < args.spa_warn_len:
                 print(
                     f"警告：抽取到的正文内容较短（<{args.spa_warn_len} 字符），该页面可能为 SPA 动态渲染；"
                     "如内容为空/不完整，可尝试：1) 使用 --target-id/--target-class 指定正文区域；"
@@ -1522,9 +1542,7 @@ urls.txt 文件格式：
                     file=sys.stderr,
                 )
 
-            collector = ImageURLCollector(base_url=url)
-            collector.feed(article_html)
-            image_urls = uniq_preserve_order(collector.image_urls)
+            image_urls = uniq_preserve_order(scanner.image_urls)
 
             print(f"发现图片：{len(image_urls)} 张，开始下载到：{assets_dir}")
             try:
@@ -1539,6 +1557,7 @@ urls.txt 文件格式：
                     page_url=url,
                     redact_urls=args.redact_url,
                     max_image_bytes=args.max_image_bytes,
+                    workers=args.img_workers,
                 )
             except Exception as e:
                 print(f"错误：图片下载失败：{e}", file=sys.stderr)
@@ -1549,9 +1568,9 @@ urls.txt 文件格式：
             if args.title:
                 title = args.title
             elif is_wechat:
-                title = extract_wechat_title(page_html) or extract_h1(article_html) or extract_title(page_html) or "Untitled"
+                title = extract_wechat_title(page_html) or scanner.h1 or extract_title(page_html) or "Untitled"
             else:
-                title = extract_h1(article_html) or extract_title(page_html) or "Untitled"
+                title = scanner.h1 or extract_title(page_html) or "Untitled"
             md_body = html_to_markdown(
                 article_html=article_html,
                 base_url=url,
@@ -1602,28 +1621,33 @@ urls.txt 文件格式：
     if args.redact_url:
         md_body = redact_urls_in_markdown(md_body)
 
+    md_parts: List[str] = []
+    if args.frontmatter:
+        md_parts.append(generate_frontmatter(title, display_url, tags))
+    # 保持正文可读性：无论是否启用 frontmatter，都写入可见标题与来源行。
+    md_parts.append(f"# {title}\n\n- Source: {display_url}\n\n")
+    md_parts.append(md_body)
+    # 拼成整篇后一次写出：只编码一次、落盘为一次连续写入
     with open(out_md, "w", encoding="utf-8") as f:
-        if args.frontmatter:
-            f.write(generate_frontmatter(title, display_url, tags))
-        # 保持正文可读性：无论是否启用 frontmatter，都写入可见标题与来源行。
-        f.write(f"# {title}\n\n")
-        f.write(f"- Source: {display_url}\n\n")
-        f.write(md_body)
+        f.write("".join(md_parts))
 
     wrote_map_json = False
     if not args.no_map_json:
         with open(map_json, "w", encoding="utf-8") as f:
             map_payload = _redact_url_to_local_map(url_to_local) if args.redact_url else url_to_local
-            json.dump(map_payload, f, ensure_ascii=False, indent=2)
+            # dumps 一次性生成整段文本再单次写出，避免 json.dump 按片段逐次 f.write
+            f.write(json.dumps(map_payload, ensure_ascii=False, indent=2))
         wrote_map_json = True
     else:
         # Bug fix: --no-map-json 时删除旧的映射文件，避免遗留未脱敏的历史 URL
-        if os.path.exists(map_json):
-            try:
-                os.remove(map_json)
-                print(f"已删除旧映射文件：{map_json}")
-            except OSError as e:
-                print(f"警告：无法删除旧映射文件 {map_json}: {e}", file=sys.stderr)
+        # 直接删除并吞掉 FileNotFoundError：免去 exists 预检的额外 stat 与检查-删除之间的竞态
+        try:
+            os.remove(map_json)
+            print(f"已删除旧映射文件：{map_json}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"警告：无法删除旧映射文件 {map_json}: {e}", file=sys.stderr)
 
     print(f"已生成：{out_md}")
     print(f"图片目录：{assets_dir}")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import html as htmllib
 import re
 import sys
@@ -8,6 +9,8 @@ from html.parser import HTMLParser
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from urllib.parse import urldefrag, urljoin, urlparse
 
+from .markdown_conv import _escape_text, _first_srcset, _iter_feed_chunks, _join_href, is_probable_icon
+
 
 @dataclass
 class DocsPreset:
@@ -188,6 +191,12 @@ DOCS_PRESETS: Dict[str, DocsPreset] = {
 }
 
 
+@functools.lru_cache(maxsize=64)
+def _detect_meta_re(pattern: str) -> re.Pattern:
+    """框架预设 detect_meta 的匹配模式（按模式串缓存编译结果）。"""
+    return re.compile(pattern, re.IGNORECASE)
+
+
 def detect_docs_framework(page_html: str) -> Tuple[Optional[str], float, List[str]]:
     if not page_html:
         return None, 0.0, []
@@ -212,7 +221,7 @@ def detect_docs_framework(page_html: str) -> Tuple[Optional[str], float, List[st
                 score += 0.25
 
         for meta_pattern in preset.detect_meta:
-            if re.search(meta_pattern, page_html, re.IGNORECASE):
+            if _detect_meta_re(meta_pattern).search(page_html):
                 signals.append(f"meta:{meta_pattern}")
                 score += 0.35
 
@@ -229,11 +238,15 @@ def detect_docs_framework(page_html: str) -> Tuple[Optional[str], float, List[st
     return best_match, best_score, best_signals
 
 
+_MD_LINK_RE = re.compile(r"\[[^\]]+\]\([^)]+\)")
+_MD_LINK_LIST_BLOCK_RE = re.compile(r"(?:^[ \t]*[-*]\s*\[[^\]]+\]\([^)]+\)\s*\n){10,}", re.MULTILINE)
+
+
 def calculate_link_density(md_content: str) -> Tuple[float, int, int]:
     if not md_content:
         return 0.0, 0, 0
 
-    links = re.findall(r"\[[^\]]+\]\([^)]+\)", md_content)
+    links = _MD_LINK_RE.findall(md_content)
     link_count = len(links)
     link_chars = sum(len(link) for link in links)
 
@@ -259,11 +272,7 @@ def check_content_quality(
             "建议使用 --strip-nav 或 --docs-preset"
         )
 
-    consecutive_links = re.findall(
-        r"(?:^[ \t]*[-*]\s*\[[^\]]+\]\([^)]+\)\s*\n){10,}",
-        md_content,
-        re.MULTILINE,
-    )
+    consecutive_links = _MD_LINK_LIST_BLOCK_RE.findall(md_content)
     if consecutive_links:
         warnings.append(
             f"⚠️ 检测到 {len(consecutive_links)} 个长链接列表块。"
@@ -406,16 +415,20 @@ class _SimpleSelectorMatcher:
         else:
             self.tag = s.lower()
 
-    def matches(self, tag: str, attrs: Dict[str, Optional[str]]) -> bool:
-        tag = tag.lower()
-
+    def matches(
+        self,
+        tag: str,
+        attrs: Dict[str, Optional[str]],
+        classes: Optional[Sequence[str]] = None,
+    ) -> bool:
         if self.tag and self.tag != tag:
             return False
         if self.tag and self.tag == tag:
             return True
 
         if self.class_name:
-            classes = _class_list(attrs)
+            if classes is None:
+                classes = _class_list(attrs)
             if self.class_name not in classes:
                 return False
             return True
@@ -439,6 +452,19 @@ class _SimpleSelectorMatcher:
         return False
 
 
+# 导航、表格等重复属性组合在同一页面中反复出现，按属性元组缓存序列化结果
+@functools.lru_cache(maxsize=4096)
+def _serialize_attrs_cached(attrs_list: Tuple[Tuple[str, Optional[str]], ...]) -> str:
+    parts = []
+    for name, value in attrs_list:
+        if value is None:
+            parts.append(name)
+        else:
+            escaped = htmllib.escape(str(value), quote=True)
+            parts.append(f'{name}="{escaped}"')
+    return " ".join(parts)
+
+
 class _HTMLElementStripper(HTMLParser):
     VOID_ELEMENTS = frozenset(
         {
@@ -472,32 +498,25 @@ class _HTMLElementStripper(HTMLParser):
         self._raw_content_depth = 0  # script/style 内不转义 data
 
     def _should_skip(self, tag: str, attrs: Dict[str, Optional[str]]) -> Optional[str]:
+        # 每个标签只拆分一次 class，供所有类选择器共用
+        classes = _class_list(attrs)
         for matcher in self.matchers:
-            if matcher.matches(tag, attrs):
+            if matcher.matches(tag, attrs, classes):
                 return matcher.selector
         return None
 
     @staticmethod
     def _attrs_to_str(attrs_list: Sequence[Tuple[str, Optional[str]]]) -> str:
-        parts = []
-        for name, value in attrs_list:
-            if value is None:
-                parts.append(name)
-            else:
-                escaped = htmllib.escape(str(value), quote=True)
-                parts.append(f'{name}="{escaped}"')
-        return " ".join(parts)
+        return _serialize_attrs_cached(tuple(attrs_list))
 
     def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
-        tag = tag.lower()
-        attrs = dict(attrs_list)
-
         if self.skip_depth > 0:
             if tag not in self.VOID_ELEMENTS:
                 self.skip_depth += 1
             return
 
-        matched = self._should_skip(tag, attrs)
+        # 跳过区内的标签无需读属性，离开跳过区后才构造 dict
+        matched = self._should_skip(tag, dict(attrs_list))
         if matched:
             if tag in self.VOID_ELEMENTS:
                 self.stats.elements_removed += 1
@@ -519,13 +538,10 @@ class _HTMLElementStripper(HTMLParser):
             self._raw_content_depth += 1
 
     def handle_startendtag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
-        tag = tag.lower()
-        attrs = dict(attrs_list)
-
         if self.skip_depth > 0:
             return
 
-        matched = self._should_skip(tag, attrs)
+        matched = self._should_skip(tag, dict(attrs_list))
         if matched:
             self.stats.elements_removed += 1
             self.stats.add_rule_match(matched)
@@ -538,8 +554,6 @@ class _HTMLElementStripper(HTMLParser):
             self.buf.append(f"<{tag}/>")
 
     def handle_endtag(self, tag: str) -> None:
-        tag = tag.lower()
-
         if self.skip_depth > 0:
             self.skip_depth -= 1
             if self.skip_depth == 0:
@@ -557,7 +571,7 @@ class _HTMLElementStripper(HTMLParser):
         if self._raw_content_depth > 0:
             self.buf.append(data)
         else:
-            self.buf.append(htmllib.escape(data, quote=False))
+            self.buf.append(_escape_text(data))
 
     def handle_comment(self, data: str) -> None:
         if self.skip_depth > 0:
@@ -601,11 +615,15 @@ def strip_html_elements(
     return result, stats
 
 
+_FENCE_OPEN_RE = re.compile(r"^([`~]{3,})")
+
+
 def _apply_regex_outside_fences(
     text: str, pattern: str, repl, flags: int = 0
 ) -> str:
     """对 text 应用 re.sub，但跳过代码围栏（``` / ~~~）内的内容。"""
-    fence_re = re.compile(r"^([`~]{3,})")
+    # 每个围栏外片段都要 sub 一次：只编译一次，避免逐段查 re 模块缓存
+    regex = re.compile(pattern, flags)
     lines = text.split("\n")
     parts: List[str] = []
     in_fence = False
@@ -614,12 +632,13 @@ def _apply_regex_outside_fences(
 
     def flush() -> None:
         if outside_buf:
-            parts.append(re.sub(pattern, repl, "\n".join(outside_buf), flags=flags))
+            parts.append(regex.sub(repl, "\n".join(outside_buf)))
             outside_buf.clear()
 
     for line in lines:
-        m = fence_re.match(line.strip())
-        if m and (not in_fence or line.strip().startswith(fence_char * 3)):
+        stripped = line.strip()
+        m = _FENCE_OPEN_RE.match(stripped)
+        if m and (not in_fence or stripped.startswith(fence_char * 3)):
             flush()
             if not in_fence:
                 in_fence = True
@@ -718,14 +737,19 @@ def get_strip_selectors(
         custom = [s.strip() for s in exclude_selectors.split(",") if s.strip()]
         selectors.extend(custom)
 
-    seen = set()
-    unique = []
-    for s in selectors:
-        if s not in seen:
-            seen.add(s)
-            unique.append(s)
+    return uniq_preserve_order(selectors)
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
 
-    return unique
+
+def _collapsed_len(data: str) -> int:
+    """等价于 ``len(_WHITESPACE_RE.sub(" ", data.strip()))``。
+
+    str.split() 与正则 \\s 使用同一套 Unicode 空白定义；按空白切分再以单空格
+    拼接即为「去首尾 + 折叠空白」，全程在 C 层完成，比正则替换快约 5 倍。
+    """
+    return len(" ".join(data.split()))
 
 
 class _TextLenExtractor(HTMLParser):
@@ -747,7 +771,7 @@ class _TextLenExtractor(HTMLParser):
             return
         if not data or data.isspace():
             return
-        self.n += len(re.sub(r"\s+", " ", data.strip()))
+        self.n += _collapsed_len(data)
 
 
 def html_text_len(html: str) -> int:
@@ -756,15 +780,20 @@ def html_text_len(html: str) -> int:
     return parser.n
 
 
-def is_probable_icon(url: str) -> bool:
-    low = url.lower()
-    return (
-        "favicon" in low
-        or "/icon/" in low
-        or low.endswith(".ico")
-        or "pinned-octocat" in low
-        or "/apple-touch-icon" in low
-    )
+# 同一页面常重复引用相同 src（logo、图标、srcset 变体），按 (base, raw) 缓存解析结果
+@functools.lru_cache(maxsize=2048)
+def _resolve_image_url(base_url: str, raw: str) -> Optional[str]:
+    raw = htmllib.unescape(raw).strip()
+    if not raw or raw.startswith("data:"):
+        return None
+    full = urljoin(base_url, raw)
+    if is_probable_icon(full):
+        return None
+    return full
+
+
+# <img> 候选 URL 属性，按优先级排列
+_IMG_SRC_ATTRS = ("src", "data-src", "data-original", "data-lazy-src")
 
 
 class ImageURLCollector(HTMLParser):
@@ -778,87 +807,195 @@ class ImageURLCollector(HTMLParser):
     def _add_url(self, raw: Optional[str]) -> None:
         if not raw:
             return
-        raw = htmllib.unescape(raw).strip()
-        if not raw or raw.startswith("data:"):
-            return
-        full = urljoin(self.base_url, raw)
-        if is_probable_icon(full):
-            return
-        self.image_urls.append(full)
+        full = _resolve_image_url(self.base_url, raw)
+        if full:
+            self.image_urls.append(full)
 
     def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
-        tag = tag.lower()
-        attrs = dict(attrs_list)
-
         if tag == "picture":
             self._in_picture = True
             self._picture_sources = []
             return
 
-        if tag == "source" and self._in_picture:
-            srcset = attrs.get("srcset")
+        if tag == "source":
+            if not self._in_picture:
+                return
+            srcset = None
+            for name, value in attrs_list:
+                if name == "srcset":
+                    srcset = value
             if srcset:
-                first = srcset.split(",")[0].strip().split(" ")[0]
+                first = _first_srcset(srcset)
                 self._picture_sources.append(first)
             return
 
-        if tag == "img":
-            if self._in_picture and self._picture_sources:
-                self._add_url(self._picture_sources[0])
-                self._picture_sources = []
-                return
+        if tag != "img":
+            return
+
+        if self._in_picture and self._picture_sources:
+            self._add_url(self._picture_sources[0])
+            self._picture_sources = []
+            return
 
-            # 懒加载场景：src 可能是 data: 占位图（base64 透明像素），
-            # 此时真实 URL 在 data-src / data-original / data-lazy-src 中。
-            # 过滤掉 data: URI 的候选，优先取真实懒加载属性。
-            candidates = [
-                attrs.get("src"),
-                attrs.get("data-src"),
-                attrs.get("data-original"),
-                attrs.get("data-lazy-src"),
-            ]
-            src = next((c for c in candidates if c and not c.strip().lower().startswith("data:")), None)
-            if not src:
-                srcset = attrs.get("srcset")
-                if srcset:
-                    src = srcset.split(",")[0].strip().split(" ")[0]
-            self._add_url(src)
+        # 只扫描一遍属性列表，取出候选 URL（同名属性后者覆盖前者，与 dict() 一致）
+        found: Dict[str, Optional[str]] = {}
+        srcset = None
+        for name, value in attrs_list:
+            if name == "srcset":
+                srcset = value
+            elif name in _IMG_SRC_ATTRS:
+                found[name] = value
+
+        # 懒加载场景：src 可能是 data: 占位图（base64 透明像素），
+        # 此时真实 URL 在 data-src / data-original / data-lazy-src 中。
+        # 过滤掉 data: URI 的候选，优先取真实懒加载属性。
+        src = next(
+            (c for c in map(found.get, _IMG_SRC_ATTRS) if c and not c.strip().lower().startswith("data:")),
+            None,
+        )
+        if not src and srcset:
+            src = _first_srcset(srcset)
+        self._add_url(src)
 
     def handle_endtag(self, tag: str) -> None:
-        tag = tag.lower()
         if tag == "picture":
             self._in_picture = False
             self._picture_sources = []
 
 
+class ArticleScanner(ImageURLCollector):
+    """单次解析同时取得图片 URL、首个 <h1> 文本与正文长度。
+
+    单页主流程对同一份 article_html 需要三者时，用它代替
+    ImageURLCollector + extract_h1 + html_text_len 的三次独立解析；
+    各字段语义与对应函数一致。
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.text_len = 0
+        self._skip_depth = 0  # script/style 嵌套深度
+        self._in_h1 = False
+        self._h1_done = False
+        self._h1_buf: List[str] = []
+
+    @property
+    def h1(self) -> Optional[str]:
+        return _WHITESPACE_RE.sub(" ", "".join(self._h1_buf)).strip() or None
+
+    def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
+        if tag in ("script", "style"):
+            self._skip_depth += 1
+        elif tag == "h1" and not self._h1_done:
+            self._in_h1 = True
+        super().handle_starttag(tag, attrs_list)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in ("script", "style"):
+            if self._skip_depth > 0:
+                self._skip_depth -= 1
+        elif tag == "h1" and self._in_h1 and not self._h1_done:
+            self._in_h1 = False
+            self._h1_done = True
+        super().handle_endtag(tag)
+
+    def handle_data(self, data: str) -> None:
+        if not data or data.isspace():
+            return
+        if self._in_h1 and not self._h1_done:
+            self._h1_buf.append(data)
+        if self._skip_depth == 0:
+            self.text_len += _collapsed_len(data)
+
+
 def uniq_preserve_order(items: Iterable[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for it in items:
-        if it in seen:
-            continue
-        seen.add(it)
-        out.append(it)
-    return out
+    # dict 保持插入顺序，去重循环在 C 层完成
+    return list(dict.fromkeys(items))
+
+
+_MAIN_SECTION_TAGS = ("article", "main", "body")
+
+
+class _SectionIndexer(HTMLParser):
+    """单次扫描记录 article/main/body 各段内容在原始 HTML 中的起止偏移。"""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        # 行号 → 行首偏移，随 feed() 增量记录，用于把 getpos() 的 (行, 列) 换算为绝对偏移
+        self._line_starts = [0]
+        self._fed = 0
+        self._depth: Dict[str, int] = {tag: 0 for tag in _MAIN_SECTION_TAGS}
+        self._open: Dict[str, int] = {}
+        self.spans: Dict[str, List[Tuple[int, int]]] = {tag: [] for tag in _MAIN_SECTION_TAGS}
+
+    def feed(self, data: str) -> None:
+        pos = data.find("\n")
+        while pos != -1:
+            self._line_starts.append(self._fed + pos + 1)
+            pos = data.find("\n", pos + 1)
+        self._fed += len(data)
+        super().feed(data)
+
+    def _offset(self) -> int:
+        lineno, col = self.getpos()
+        return self._line_starts[lineno - 1] + col
+
+    def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
+        depth = self._depth.get(tag)
+        if depth is None:
+            return
+        if depth == 0:
+            self._open[tag] = self._offset() + len(self.get_starttag_text() or "")
+        self._depth[tag] = depth + 1
+
+    def handle_endtag(self, tag: str) -> None:
+        depth = self._depth.get(tag)
+        if not depth:
+            return
+        self._depth[tag] = depth - 1
+        if depth == 1:
+            self.spans[tag].append((self._open.pop(tag), self._offset()))
+
+
+@functools.lru_cache(maxsize=None)
+def _section_re(tag: str) -> re.Pattern[str]:
+    return re.compile(rf"<{tag}\b[^>]*>(.*?)</{tag}>", re.IGNORECASE | re.DOTALL)
 
 
 def _find_best_section(html: str, tag: str) -> Optional[str]:
-    pattern = re.compile(rf"<{tag}\b[^>]*>(.*?)</{tag}>", re.IGNORECASE | re.DOTALL)
-    matches = list(pattern.finditer(html))
+    matches = list(_section_re(tag).finditer(html))
     if not matches:
         return None
     best = max(matches, key=lambda m: len(m.group(1)))
     return best.group(1)
 
 
-def extract_main_html(page_html: str) -> str:
-    for tag in ("article", "main", "body"):
+def _extract_main_html_by_regex(page_html: str) -> str:
+    for tag in _MAIN_SECTION_TAGS:
         section = _find_best_section(page_html, tag)
         if section:
             return section
     return page_html
 
 
+def extract_main_html(page_html: str) -> str:
+    indexer = _SectionIndexer()
+    indexer.feed(page_html)
+    # 未闭合的 <style>/<script>（CDATA 模式）或 <!-- 会让 HTMLParser 吞掉页面剩余部分，
+    # 此时各段偏移不可信，回退到按标签的正则搜索
+    if indexer.cdata_elem is not None or indexer.rawdata:
+        return _extract_main_html_by_regex(page_html)
+    indexer.close()
+    for tag in _MAIN_SECTION_TAGS:
+        spans = indexer.spans[tag]
+        if not spans:
+            continue
+        start, end = max(spans, key=lambda span: span[1] - span[0])
+        if end > start:
+            return page_html[start:end]
+    return _extract_main_html_by_regex(page_html)
+
+
 # void 元素：没有结束标签，深度计数器不应为其 +1
 _VOID_TAGS_EXTRACTOR = frozenset(
     {
@@ -880,14 +1017,7 @@ class _TargetSectionExtractor(HTMLParser):
 
     @staticmethod
     def _attrs_to_str(attrs_list: Sequence[Tuple[str, Optional[str]]]) -> str:
-        parts = []
-        for name, value in attrs_list:
-            if value is None:
-                parts.append(name)
-            else:
-                escaped = htmllib.escape(str(value), quote=True)
-                parts.append(f'{name}="{escaped}"')
-        return " ".join(parts)
+        return _serialize_attrs_cached(tuple(attrs_list))
 
     def _match(self, attrs: Dict[str, Optional[str]]) -> bool:
         if self.target_id and (attrs.get("id") or "").strip() == self.target_id:
@@ -901,10 +1031,9 @@ class _TargetSectionExtractor(HTMLParser):
     def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
         if self.done:
             return
-        tag = tag.lower()
-        attrs = dict(attrs_list)
         if self.depth == 0:
-            if not self._match(attrs):
+            # 只有寻找目标容器时才需要属性 dict；进入容器后原样序列化
+            if not self._match(dict(attrs_list)):
                 return
             if tag in _VOID_TAGS_EXTRACTOR:
                 # 目标容器本身是 void 元素（如 <img id="content">）：
@@ -929,10 +1058,8 @@ class _TargetSectionExtractor(HTMLParser):
     def handle_startendtag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
         if self.done:
             return
-        tag = tag.lower()
-        attrs = dict(attrs_list)
         if self.depth == 0:
-            if not self._match(attrs):
+            if not self._match(dict(attrs_list)):
                 return
             self.done = True
         # 自闭合标签（含 void 元素的 <br/> 写法）不改变深度
@@ -945,7 +1072,6 @@ class _TargetSectionExtractor(HTMLParser):
     def handle_endtag(self, tag: str) -> None:
         if self.done or self.depth == 0:
             return
-        tag = tag.lower()
         self.buf.append(f"</{tag}>")
         if tag in ("script", "style") and self._raw_content_depth > 0:
             self._raw_content_depth -= 1
@@ -960,13 +1086,21 @@ class _TargetSectionExtractor(HTMLParser):
         if self._raw_content_depth > 0:
             self.buf.append(data)
         else:
-            self.buf.append(htmllib.escape(data, quote=False))
+            self.buf.append(_escape_text(data))
+
+
+_TARGET_FEED_CHUNK_SIZE = 64 * 1024
 
 
 def extract_target_html(page_html: str, *, target_id: Optional[str], target_class: Optional[str]) -> Optional[str]:
     parser = _TargetSectionExtractor(target_id=target_id, target_class=target_class)
+    # 目标容器闭合后其余页面（页脚、内联脚本/JSON 等）不再影响结果：
+    # 按 '<' 对齐分块喂入，取到完整容器即停止解析
     try:
-        parser.feed(page_html or "")
+        for chunk in _iter_feed_chunks(page_html or "", _TARGET_FEED_CHUNK_SIZE):
+            parser.feed(chunk)
+            if parser.done:
+                break
     except Exception:
         return None
     out = "".join(parser.buf).strip()
@@ -995,11 +1129,14 @@ def extract_target_html_multi(
     return None, None
 
 
+_TITLE_TAG_RE = re.compile(r"<title\b[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
 def extract_title(page_html: str) -> Optional[str]:
-    m = re.search(r"<title\b[^>]*>(.*?)</title>", page_html, re.IGNORECASE | re.DOTALL)
+    m = _TITLE_TAG_RE.search(page_html)
     if not m:
         return None
-    title = re.sub(r"\s+", " ", htmllib.unescape(m.group(1))).strip()
+    title = _WHITESPACE_RE.sub(" ", htmllib.unescape(m.group(1))).strip()
     return title or None
 
 
@@ -1013,13 +1150,13 @@ class _H1Extractor(HTMLParser):
     def handle_starttag(self, tag: str, attrs: Sequence[Tuple[str, Optional[str]]]) -> None:
         if self.done:
             return
-        if tag.lower() == "h1":
+        if tag == "h1":
             self.in_h1 = True
 
     def handle_endtag(self, tag: str) -> None:
         if self.done:
             return
-        if tag.lower() == "h1" and self.in_h1:
+        if tag == "h1" and self.in_h1:
             self.in_h1 = False
             self.done = True
 
@@ -1029,10 +1166,21 @@ class _H1Extractor(HTMLParser):
         self.buf.append(data)
 
 
+# HTMLParser 的标签名止于空白、'/'、'>' 或 NUL；不含此模式的页面不可能出现 <h1> 起始标签
+_H1_START_RE = re.compile(r"<h1[\s/>\x00]", re.IGNORECASE)
+_H1_FEED_CHUNK_SIZE = 16 * 1024
+
+
 def extract_h1(article_html: str) -> Optional[str]:
+    if not _H1_START_RE.search(article_html):
+        return None
     parser = _H1Extractor()
-    parser.feed(article_html)
-    title = re.sub(r"\s+", " ", "".join(parser.buf)).strip()
+    # 首个 </h1> 之后的内容不再影响结果：按 '<' 对齐分块喂入，取到标题即停止解析
+    for chunk in _iter_feed_chunks(article_html, _H1_FEED_CHUNK_SIZE):
+        parser.feed(chunk)
+        if parser.done:
+            break
+    title = _WHITESPACE_RE.sub(" ", "".join(parser.buf)).strip()
     return title or None
 
 
@@ -1061,36 +1209,39 @@ def is_wechat_article_html(html: str) -> bool:
     return any(marker.lower() in html_lower for marker in wechat_markers)
 
 
+_WECHAT_TITLE_H1_RE = re.compile(
+    r'<h1[^>]*class=["\'][^"\']*rich_media_title[^"\']*["\'][^>]*>(.*?)</h1>',
+    re.IGNORECASE | re.DOTALL,
+)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_OG_TITLE_META_RE = re.compile(
+    r'<meta[^>]*property=["\']og:title["\'][^>]*content=["\']([^"\']+)["\']',
+    re.IGNORECASE,
+)
+_TWITTER_TITLE_META_RE = re.compile(
+    r'<meta[^>]*name=["\']twitter:title["\'][^>]*content=["\']([^"\']+)["\']',
+    re.IGNORECASE,
+)
+
+
 def extract_wechat_title(html: str) -> Optional[str]:
     if not html:
         return None
 
-    m = re.search(
-        r'<h1[^>]*class=["\'][^"\']*rich_media_title[^"\']*["\'][^>]*>(.*?)</h1>',
-        html,
-        re.IGNORECASE | re.DOTALL,
-    )
+    m = _WECHAT_TITLE_H1_RE.search(html)
     if m:
-        title = re.sub(r"<[^>]+>", "", m.group(1))
-        title = re.sub(r"\s+", " ", htmllib.unescape(title)).strip()
+        title = _HTML_TAG_RE.sub("", m.group(1))
+        title = _WHITESPACE_RE.sub(" ", htmllib.unescape(title)).strip()
         if title:
             return title
 
-    m = re.search(
-        r'<meta[^>]*property=["\']og:title["\'][^>]*content=["\']([^"\']+)["\']',
-        html,
-        re.IGNORECASE,
-    )
+    m = _OG_TITLE_META_RE.search(html)
     if m:
         title = htmllib.unescape(m.group(1)).strip()
         if title:
             return title
 
-    m = re.search(
-        r'<meta[^>]*name=["\']twitter:title["\'][^>]*content=["\']([^"\']+)["\']',
-        html,
-        re.IGNORECASE,
-    )
+    m = _TWITTER_TITLE_META_RE.search(html)
     if m:
         title = htmllib.unescape(m.group(1)).strip()
         if title:
@@ -1112,7 +1263,7 @@ class LinkExtractor(HTMLParser):
         self._current_text: List[str] = []
 
     def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
-        if tag.lower() == "a":
+        if tag == "a":
             attrs = dict(attrs_list)
             href = attrs.get("href")
             if href:
@@ -1121,9 +1272,10 @@ class LinkExtractor(HTMLParser):
                 self._current_text = []
 
     def handle_endtag(self, tag: str) -> None:
-        if tag.lower() == "a" and self._in_a:
+        if tag == "a" and self._in_a:
             if self._current_href:
-                full_url = urljoin(self.base_url, self._current_href)
+                # 同一页面的导航/页脚链接常重复出现，复用转换器的 urljoin 缓存
+                full_url = _join_href(self.base_url, self._current_href)
                 text = "".join(self._current_text).strip()
 
                 if self.same_domain:
@@ -1230,6 +1382,22 @@ def _wechat_jsdecode(s: str) -> str:
     )
 
 
+_WECHAT_IS_ASYNC_RE = re.compile(r"""is_async\s*:\s*['"]?(\d+)['"]?""")
+_WECHAT_CONTENT_NOENCODE_RE = re.compile(r"content_noencode\s*:\s*JsDecode\('(.*?)'\)", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=32)
+def _wechat_jsdecode_field_re(field: str) -> re.Pattern:
+    """cgiDataNew 中 ``field: JsDecode('...')`` 的匹配模式（按字段名缓存编译结果）。"""
+    return re.compile(rf"(?<![_\w]){re.escape(field)}\s*:\s*JsDecode\('(.*?)'\)", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=32)
+def _wechat_raw_field_re(field: str) -> re.Pattern:
+    """cgiDataNew 中 ``field: 'value'`` / ``field: 123`` 的匹配模式（按字段名缓存编译结果）。"""
+    return re.compile(r"(?<![_\w])" + re.escape(field) + r"""\s*:\s*['"]?([^'",\s}]+)['"]?""")
+
+
 def is_wechat_async_article(page_html: str) -> bool:
     """
     检测是否为微信"小绿书"/图文笔记等异步渲染格式。
@@ -1244,7 +1412,7 @@ def is_wechat_async_article(page_html: str) -> bool:
     if 'class="rich_media_content' in page_html or 'id="js_content"' in page_html:
         return False
     # 兼容 JS 对象中 is_async 的三种合法写法：'1'、"1"、1
-    m = re.search(r"""is_async\s*:\s*['"]?(\d+)['"]?""", page_html)
+    m = _WECHAT_IS_ASYNC_RE.search(page_html)
     return m is not None and m.group(1) == "1"
 
 
@@ -1264,14 +1432,13 @@ def extract_wechat_async_content(page_html: str) -> Optional[Dict[str, str]]:
     chunk = page_html[cgi_idx : script_end] if script_end > cgi_idx else page_html[cgi_idx:]
 
     def _extract_jsdecode(field: str) -> str:
-        m = re.search(rf"(?<![_\w]){re.escape(field)}\s*:\s*JsDecode\('(.*?)'\)", chunk, re.DOTALL)
+        m = _wechat_jsdecode_field_re(field).search(chunk)
         if m:
             return _wechat_jsdecode(m.group(1))
         return ""
 
     def _extract_raw(field: str) -> str:
-        pat = r"(?<![_\w])" + re.escape(field) + r"""\s*:\s*['""]?([^'"",\s}]+)['""]?"""
-        m = re.search(pat, chunk)
+        m = _wechat_raw_field_re(field).search(chunk)
         if m:
             return m.group(1).strip()
         return ""
@@ -1284,7 +1451,7 @@ def extract_wechat_async_content(page_html: str) -> Optional[Dict[str, str]]:
     tpi_idx = chunk.find("text_page_info")
     if tpi_idx >= 0:
         tpi_chunk = chunk[tpi_idx:]
-        m_cn = re.search(r"content_noencode\s*:\s*JsDecode\('(.*?)'\)", tpi_chunk, re.DOTALL)
+        m_cn = _WECHAT_CONTENT_NOENCODE_RE.search(tpi_chunk)
         if m_cn:
             content = _wechat_jsdecode(m_cn.group(1))
     if not content:
@@ -2,20 +2,24 @@ from __future__ import annotations
 
 import argparse
 import codecs
+import functools
 import json
 import os
 import re
 import shutil
-import subprocess
 import sys
 import time
-from typing import Dict, Optional, Sequence
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
 
 _DEFAULT_MAX_HTML_BYTES = 10 * 1024 * 1024  # 10MB/页；设为 0 表示不限制
+_POOL_CONNECTIONS = 16  # 连接池按 host 缓存的数量
+_POOL_MAXSIZE = 32  # 单个 host 的最大 keep-alive 连接数（不小于图片并发数）
 
-UA_PRESETS: Dict[str, str] = {
+UA_PRESETS: Mapping[str, str] = MappingProxyType({
     "tool": "Mozilla/5.0 (compatible; grab_web_to_md/1.0)",
     "edge-win": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -46,7 +50,8 @@ UA_PRESETS: Dict[str, str] = {
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/120.0.0.0 Safari/537.36"
     ),
-}
+})
+_DEFAULT_UA = UA_PRESETS["chrome-win"]
 
 
 # ---------------------------------------------------------------------------
@@ -97,9 +102,30 @@ def read_local_html_file(filepath: str) -> str:
 
 
 def _resolve_user_agent(user_agent: Optional[str], ua_preset: str) -> str:
-    if user_agent and user_agent.strip():
-        return user_agent.strip()
-    return UA_PRESETS.get(ua_preset, UA_PRESETS["chrome-win"])
+    ua = (user_agent or "").strip()
+    if ua:
+        return ua
+    return UA_PRESETS.get(ua_preset, _DEFAULT_UA)
+
+
+_ERROR_BODY_DRAIN_LIMIT = 64 * 1024  # 错误响应体不超过此大小时读完，以便连接回池复用
+
+
+def _drain_error_body(r: requests.Response, limit: int = _ERROR_BODY_DRAIN_LIMIT) -> None:
+    """读完（小体积的）错误响应体。
+
+    stream=True 的响应若未读完就 close，urllib3 只能丢弃底层连接，随后的重试
+    （429/5xx）或同站下一个请求都要重新建连 + TLS 握手；读完后 close 则连接回池。
+    超过 *limit* 的响应体不再读，交由 close 丢弃连接。
+    """
+    try:
+        n = 0
+        for chunk in r.iter_content(chunk_size=16 * 1024):
+            n += len(chunk)
+            if n > limit:
+                return
+    except Exception:
+        pass
 
 
 def fetch_html(
@@ -115,15 +141,10 @@ def fetch_html(
     for attempt in range(1, retries + 1):
         r: Optional[requests.Response] = None
         try:
-            r = session.get(
-                url,
-                timeout=timeout_s,
-                stream=True,
-                headers={
-                    "Connection": "close",
-                    "Accept-Encoding": "identity",
-                },
-            )
+            # 不强制 Connection: close / Accept-Encoding: identity：
+            # HTML 走 gzip/deflate 压缩传输，连接留在池中供同站后续页面与图片复用。
+            # 大小上限按解压后字节在下方流式累积时检查，压缩炸弹同样会被截断。
+            r = session.get(url, timeout=timeout_s, stream=True)
             r.raise_for_status()
 
             if max_bytes is not None:
@@ -143,7 +164,9 @@ def fetch_html(
                 if max_bytes is not None and len(buf) > max_bytes:
                     raise RuntimeError(f"HTML 响应过大（>{max_bytes} bytes）：{url}")
 
-            raw = bytes(buf)
+            # 直接在累积缓冲区上检测/解码，不再复制成 bytes，也不经过
+            # requests 的 .text（其在缺少 charset 时会对全文做 chardet 猜测）
+            raw = buf
 
             # ── 编码检测 ──────────────────────────────────────
             # requests 在 HTTP Content-Type 未声明 charset 时会默认
@@ -167,6 +190,8 @@ def fetch_html(
             if isinstance(e, RuntimeError):
                 raise
             if isinstance(e, requests.exceptions.HTTPError):
+                if r is not None:
+                    _drain_error_body(r)
                 status = e.response.status_code if e.response is not None else 0
                 # 4xx 客户端错误（除 429 Too Many Requests）是确定性的——
                 # 服务器明确拒绝（401/403/404/410 等），重试不会改变结果。
@@ -189,33 +214,38 @@ def fetch_html(
 # Browser-based HTML fetching (--browser-fetch)
 # ---------------------------------------------------------------------------
 
+_BROWSER_PATH_NAMES = (
+    "google-chrome", "google-chrome-stable", "chrome",
+    "chromium", "chromium-browser", "msedge",
+)
+_BROWSER_FIXED_PATHS = (
+    # macOS
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    "/Applications/Chromium.app/Contents/MacOS/Chromium",
+    "/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge",
+    # Windows
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+)
+
+
+@functools.lru_cache(maxsize=1)
 def _find_browser() -> Optional[str]:
     """查找系统安装的 Chromium 系浏览器。
 
     检测顺序：PATH 中的可执行文件 → macOS 常见路径 → Windows 常见路径。
     用于 --browser-fetch；PDF 导出由专门的 PDF/文档 skill 处理。
+    命中即返回，结果在进程内缓存（批量模式下每个 URL 不再重复遍历 PATH）。
     """
-    path_names = [
-        "google-chrome", "google-chrome-stable", "chrome",
-        "chromium", "chromium-browser", "msedge",
-    ]
-    candidates = [shutil.which(n) for n in path_names]
-    # macOS
-    candidates += [
-        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
-        "/Applications/Chromium.app/Contents/MacOS/Chromium",
-        "/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge",
-    ]
-    # Windows
-    candidates += [
-        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-        r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-        r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
-    ]
-    for c in candidates:
-        if c and os.path.isfile(c):
-            return c
+    for name in _BROWSER_PATH_NAMES:
+        found = shutil.which(name)
+        if found and os.path.isfile(found):
+            return found
+    for path in _BROWSER_FIXED_PATHS:
+        if os.path.isfile(path):
+            return path
     return None
 
 
@@ -252,7 +282,9 @@ def browser_fetch_html(url: str, *, timeout_s: int = 60) -> str:
     Raises:
         RuntimeError: 浏览器未找到、超时或输出异常。
     """
+    # 仅 --browser-fetch 用到的模块按需导入，常规运行（含 --help）不付出导入成本
     import socket
+    import subprocess
     import tempfile
     import urllib.request
 
@@ -395,11 +427,16 @@ def _parse_cookies_file(filepath: str) -> Dict[str, str]:
 
     支持浏览器导出常见的 ``#HttpOnly_`` 前缀行（HttpOnly cookie）；
     真正的注释行（以 ``#`` 开头且非该前缀）仍被跳过。
+
+    不使用 ``http.cookiejar.MozillaCookieJar``：它要求文件首行是
+    ``# Netscape HTTP Cookie File`` 魔术头、遇到任一畸形行即整体失败，
+    且把浏览器导出的会话 cookie（expires 为 ``0``）视为已过期而不发送。
     """
     cookies: Dict[str, str] = {}
     with open(filepath, "r", encoding="utf-8") as f:
         for line in f:
-            line = line.strip()
+            # 只去掉行尾换行：value 为空时末尾的 \t 是字段分隔符，不能被 strip 掉
+            line = line.rstrip("\r\n").lstrip()
             if not line:
                 continue
             # Netscape 扩展：#HttpOnly_<domain>\t... 表示 HttpOnly cookie
@@ -407,10 +444,13 @@ def _parse_cookies_file(filepath: str) -> Dict[str, str]:
                 line = line[len("#HttpOnly_"):]
             elif line.startswith("#"):
                 continue
-            parts = line.split("\t")
-            if len(parts) >= 7:
-                name, value = parts[5], parts[6]
-                cookies[name] = value
+            # value 是最后一个字段：最多切 6 刀，value 内的 \t 原样保留；缺失的末字段视为空值。
+            # 切分后再去掉 value 首尾空白（行尾多余的空格/制表符不属于 value）
+            parts = line.split("\t", 6)
+            if len(parts) == 7:
+                cookies[parts[5]] = parts[6].strip()
+            elif len(parts) == 6 and parts[5]:
+                cookies[parts[5]] = ""
     return cookies
 
 
@@ -418,9 +458,9 @@ def _parse_cookie_string(cookie_str: str) -> Dict[str, str]:
     """解析 Cookie 字符串，如 'session=abc; token=xyz'。"""
     cookies: Dict[str, str] = {}
     for part in cookie_str.split(";"):
-        part = part.strip()
-        if "=" in part:
-            name, value = part.split("=", 1)
+        # partition 一次扫描即得 (name, sep, value)，省去 "in" + split 的二次扫描
+        name, sep, value = part.partition("=")
+        if sep:
             cookies[name.strip()] = value.strip()
     return cookies
 
@@ -429,9 +469,9 @@ def _apply_header_lines(headers: Dict[str, str], header_lines: Sequence[str]) ->
     for h in header_lines:
         if not h:
             continue
-        if ":" not in h:
+        k, sep, v = h.partition(":")
+        if not sep:
             raise ValueError(f"--header 格式应为 'Key: Value'，收到：{h!r}")
-        k, v = h.split(":", 1)
         k = k.strip()
         v = v.strip()
         if not k:
@@ -439,9 +479,27 @@ def _apply_header_lines(headers: Dict[str, str], header_lines: Sequence[str]) ->
         headers[k] = v
 
 
+@functools.lru_cache(maxsize=8)
+def _shared_adapter(pool_maxsize: int) -> HTTPAdapter:
+    """按池大小复用的 HTTPAdapter（连接池）。
+
+    Cookie / Header 等会话状态都挂在 Session 上，adapter 只持有 keep-alive 连接，
+    因此同一进程内多次调用 main()（库方式批量处理）可跨 Session 复用已建立的
+    TCP/TLS 连接，而不会串用身份状态。
+    """
+    # 重试由调用方自行控制，adapter 层不重试。
+    return HTTPAdapter(pool_connections=_POOL_CONNECTIONS, pool_maxsize=pool_maxsize, max_retries=0)
+
+
 def _create_session(args: argparse.Namespace, referer_url: Optional[str] = None) -> requests.Session:
     """创建并配置 requests.Session"""
     session = requests.Session()
+    # 连接池大小按图片并发数放大，避免 worker 多于 pool_maxsize 时
+    # urllib3 丢弃多余连接（"Connection pool is full"）导致重复握手。
+    pool_maxsize = max(_POOL_MAXSIZE, getattr(args, "img_workers", 0) or 0)
+    adapter = _shared_adapter(pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.headers.update(
         {
             "User-Agent": _resolve_user_agent(args.user_agent, args.ua_preset),
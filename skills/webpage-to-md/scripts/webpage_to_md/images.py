@@ -1,20 +1,40 @@
 from __future__ import annotations
 
+import functools
 import hashlib
 import os
 import re
 import sys
+import tempfile
+import threading
 import time
-from typing import Callable, Dict, List, Optional, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 from urllib.parse import quote, unquote, urljoin, urlparse
 
 import requests
 
+from .http_client import _drain_error_body
 from .models import BatchPageResult
 from .security import redact_url
 
 _DEFAULT_MAX_IMAGE_BYTES = 25 * 1024 * 1024  # 25MB/张；设为 0 表示不限制
 _MAX_REDIRECTS = 10
+_DEFAULT_IMAGE_WORKERS = 8  # 图片并发下载线程数（--img-workers）
+_MAX_FETCHES_PER_HOST = 8  # 单个 host 同时在途的图片请求上限（调大 --img-workers 时不集中压向同一图床）
+_KNOWN_IMAGE_EXTS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".avif", ".bmp", ".ico"})
+
+
+def _read_umask() -> int:
+    # os.umask 只能"设置并返回旧值"：导入时读一次并立即恢复，避免在 worker 线程中改动进程级状态
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# mkstemp 建出的临时文件为 0600，os.replace 会原样保留；落盘图片改回普通新文件的权限（0666 & ~umask）
+_IMAGE_FILE_MODE = 0o666 & ~_read_umask()
 
 
 def _host_of(url: str) -> str:
@@ -30,10 +50,15 @@ def _is_same_host(url_a: str, url_b: str) -> bool:
     return bool(ha) and ha == hb
 
 
+_FILENAME_UNSAFE_RE = re.compile(r"[^\w.\-]+", re.UNICODE)
+_MULTI_DASH_RE = re.compile(r"-{2,}")
+
+
+@functools.lru_cache(maxsize=4096)
 def _sanitize_filename_part(text: str) -> str:
     text = text.strip()
-    text = re.sub(r"[^\w.\-]+", "-", text, flags=re.UNICODE)
-    text = re.sub(r"-{2,}", "-", text)
+    text = _FILENAME_UNSAFE_RE.sub("-", text)
+    text = _MULTI_DASH_RE.sub("-", text)
     return text.strip("-") or "untitled"
 
 
@@ -51,46 +76,58 @@ def _safe_path_length(base_dir: str, filename: str, max_total: int = 250) -> str
     return new_filename
 
 
+# 按前 4 字节魔数分派：(扩展名, 完整签名校验)；校验为 None 表示 4 字节即可确定
+_SNIFF4: Dict[bytes, Tuple[str, Optional[Callable[[bytes], bool]]]] = {
+    b"\x89PNG": (".png", lambda d: len(d) >= 12 and d[:8] == b"\x89PNG\r\n\x1a\n"),
+    b"GIF8": (".gif", lambda d: d[:6] in (b"GIF87a", b"GIF89a")),
+    b"RIFF": (".webp", lambda d: len(d) >= 12 and d[8:12] == b"WEBP"),
+    b"%PDF": (".pdf", None),
+}
+_HTML_MARKERS = (b"<html", b"<body", b"<head", b"<!doctype html")
+# sniff_ext 最多检查前 2048 字节（SVG 的 HTML 标志排除）；调用方只需切这么多
+_SNIFF_HEAD_BYTES = 2048
+
+
 def sniff_ext(data: bytes) -> Optional[str]:
-    if len(data) >= 12 and data[:8] == b"\x89PNG\r\n\x1a\n":
-        return ".png"
-    if len(data) >= 3 and data[:3] == b"\xff\xd8\xff":
+    if data[:3] == b"\xff\xd8\xff":
         return ".jpg"
-    if len(data) >= 6 and (data[:6] in (b"GIF87a", b"GIF89a")):
-        return ".gif"
-    if len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WEBP":
-        return ".webp"
-    if len(data) >= 4 and data[:4] == b"%PDF":
-        return ".pdf"
+    entry = _SNIFF4.get(data[:4])
+    if entry is not None:
+        ext, check = entry
+        if check is None or check(data):
+            return ext
     if len(data) >= 12 and data[4:8] == b"ftyp" and data[8:12] in (b"avif", b"avis"):
         return ".avif"
     head = data[:512].lstrip()
     # SVG 检测：仅当内容确实是 SVG（以 <svg 或 <?xml...<svg 开头），
     # 且不含 <html>/<body>/<head> 等 HTML 标志（避免把内联 SVG 的 HTML
     # 错误页误判为 .svg）
-    if not any(tag in data[:2048].lower() for tag in (b"<html", b"<body", b"<head", b"<!doctype html")):
-        if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head[:256]):
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head[:256]):
+        lowered = data[:_SNIFF_HEAD_BYTES].lower()
+        if not any(tag in lowered for tag in _HTML_MARKERS):
             return ".svg"
     return None
 
 
+_CONTENT_TYPE_EXTS: Dict[str, str] = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+    "image/bmp": ".bmp",
+    "image/x-icon": ".ico",
+    "image/vnd.microsoft.icon": ".ico",
+    "image/avif": ".avif",
+}
+
+
 def ext_from_content_type(content_type: Optional[str]) -> Optional[str]:
     if not content_type:
         return None
-    ct = content_type.split(";")[0].strip().lower()
-    mapping = {
-        "image/png": ".png",
-        "image/jpeg": ".jpg",
-        "image/jpg": ".jpg",
-        "image/gif": ".gif",
-        "image/webp": ".webp",
-        "image/svg+xml": ".svg",
-        "image/bmp": ".bmp",
-        "image/x-icon": ".ico",
-        "image/vnd.microsoft.icon": ".ico",
-        "image/avif": ".avif",
-    }
-    return mapping.get(ct)
+    ct = content_type.split(";", 1)[0].strip().lower()
+    return _CONTENT_TYPE_EXTS.get(ct)
 
 
 def _create_anonymous_image_session(base_session: requests.Session) -> requests.Session:
@@ -134,6 +171,12 @@ def _create_anonymous_image_session(base_session: requests.Session) -> requests.
     return s
 
 
+# 同一页面的所有图片共用同一个 Referer，跨域脱敏结果按页面 URL 缓存
+@functools.lru_cache(maxsize=256)
+def _redacted_referer(referer: str) -> str:
+    return redact_url(referer)
+
+
 def _safe_image_get(
     img_url: str,
     page_url: str,
@@ -154,17 +197,21 @@ def _safe_image_get(
     is_same = _is_same_host(img_url, page_url)
     current_session = session if is_same else anon_session
 
+    # 不再强制 Connection: close —— 同一图床的多张图片复用连接池中的
+    # keep-alive 连接，省去每张图一次 TCP/TLS 握手。
+    # Referer 在整条重定向链中不变，同域/跨域两种请求头各构造一次
+    same_headers: Dict[str, str] = {"Referer": referer} if referer else {}
+    cross_headers = same_headers
+    if referer and redact_urls:
+        cross_headers = {"Referer": _redacted_referer(referer)}
+
     for _ in range(_MAX_REDIRECTS):
-        headers = {"Connection": "close"}
-        if referer:
-            effective_referer = referer if is_same or not redact_urls else redact_url(referer)
-            headers["Referer"] = effective_referer
         r = current_session.get(
             current_url,
             timeout=timeout_s,
             stream=True,
             allow_redirects=False,
-            headers=headers,
+            headers=same_headers if is_same else cross_headers,
         )
 
         if r.status_code not in (301, 302, 303, 307, 308):
@@ -191,6 +238,248 @@ def _safe_image_get(
     raise RuntimeError(f"图片 URL 重定向次数超过 {_MAX_REDIRECTS} 次: {img_url}")
 
 
+def _fetch_image(
+    img_url: str,
+    *,
+    page_url: str,
+    session: requests.Session,
+    anon_session: requests.Session,
+    timeout_s: int,
+    retries: int,
+    referer: str,
+    redact_urls: bool,
+    max_bytes: Optional[int],
+    assets_dir: str,
+) -> Tuple[str, Optional[str], bytes, Optional[str]]:
+    """下载单张图片（含重试），返回 ``(tmp_path, content_type, digest, sniffed_ext)``。
+
+    在线程池 worker 中执行：响应体按块直接写入 *assets_dir* 下的临时 .part 文件，
+    不在内存中累积整张图片；最终文件名（依赖编号与扩展名）与去重由调用方在主线程决定。
+    """
+    last_err: Optional[Exception] = None
+    r: Optional[requests.Response] = None
+    for attempt in range(1, retries + 1):
+        try:
+            r = _safe_image_get(
+                img_url=img_url,
+                page_url=page_url,
+                session=session,
+                anon_session=anon_session,
+                timeout_s=timeout_s,
+                referer=referer,
+                redact_urls=redact_urls,
+            )
+            r.raise_for_status()
+            break
+        except Exception as e:
+            last_err = e
+            if r is not None:
+                if isinstance(e, requests.exceptions.HTTPError):
+                    _drain_error_body(r)
+                try:
+                    r.close()
+                except Exception:
+                    pass
+                r = None
+            if attempt >= retries:
+                break
+            time.sleep(min(2.0, 0.4 * attempt))
+
+    if r is None:
+        raise last_err or RuntimeError("image download failed")
+
+    try:
+        return _stream_to_part_file(r, assets_dir, max_bytes)
+    finally:
+        try:
+            r.close()
+        except Exception:
+            pass
+
+
+def _stream_to_part_file(
+    r: requests.Response, assets_dir: str, max_bytes: Optional[int]
+) -> Tuple[str, Optional[str], bytes, Optional[str]]:
+    """把响应体边读边写入临时 .part 文件，同时计算内容摘要、按首块嗅探扩展名。
+
+    失败（超限、空响应体、读写异常）时删除临时文件再抛出。
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=".img-", suffix=".part", dir=assets_dir)
+    hasher = hashlib.blake2b(digest_size=16)
+    head = b""
+    size = 0
+    try:
+        try:
+            os.chmod(tmp_path, _IMAGE_FILE_MODE)
+            for chunk in r.iter_content(chunk_size=1024 * 64):
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise RuntimeError(f"图片过大（>{max_bytes} bytes）")
+                if len(head) < _SNIFF_HEAD_BYTES:
+                    head += chunk[: _SNIFF_HEAD_BYTES - len(head)]
+                hasher.update(chunk)
+                _write_all(fd, chunk)
+        finally:
+            os.close(fd)
+        # 空响应体（200 但 0 字节）视为失败，不落盘空文件
+        if not size:
+            raise RuntimeError("空响应体（0 字节），服务端返回了空内容")
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    return tmp_path, r.headers.get("Content-Type"), hasher.digest(), sniff_ext(head)
+
+
+def _interleave_by_host(jobs: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """按 host 轮转重排下载任务，避免同一图床的任务扎堆排在队首、占满 worker。"""
+    buckets: Dict[str, List[Tuple[int, str]]] = {}
+    for job in jobs:
+        buckets.setdefault(_host_of(job[1]), []).append(job)
+    if len(buckets) <= 1:
+        return jobs
+    return [job for group in zip_longest(*buckets.values()) for job in group if job is not None]
+
+
+def _host_slots(jobs: List[Tuple[int, str]], limit: int) -> Dict[str, threading.BoundedSemaphore]:
+    """为每个 host 预建并发信号量（在主线程建好，worker 只读取）。"""
+    return {host: threading.BoundedSemaphore(limit) for host in {_host_of(u) for _, u in jobs}}
+
+
+def _fetch_image_in_slot(
+    slot: threading.BoundedSemaphore, img_url: str, **kwargs
+) -> Tuple[str, Optional[str], bytes, Optional[str]]:
+    with slot:
+        return _fetch_image(img_url, **kwargs)
+
+
+def _write_all(fd: int, content: bytes) -> None:
+    """向无缓冲 fd 写入整块内容（仅在短写时续写剩余部分）。"""
+    view = memoryview(content)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# 内容摘要 → (临时文件绝对路径, 共用该内容的 [(idx, img_url, content_type, sniffed_ext), ...])
+_StagedImages = Dict[bytes, Tuple[str, List[Tuple[int, str, Optional[str], Optional[str]]]]]
+
+
+def _discard_fetched(futures: Dict[Future, Tuple[int, str]], staged: _StagedImages) -> None:
+    """中止下载后清理残留的临时 .part 文件：已暂存的，以及已完成但未被取走的 worker 结果。
+
+    须在线程池关闭（在途任务全部结束）之后调用。
+    """
+    for tmp_path, _ in staged.values():
+        _remove_quietly(tmp_path)
+    for future in futures:
+        if future.cancelled() or future.exception() is not None:
+            continue
+        _remove_quietly(future.result()[0])
+
+
+def _assets_rel_prefix(assets_dir: str, md_dir: str) -> str:
+    """计算 assets 目录相对 *md_dir* 的路径前缀（以 "/" 结尾，同目录时为空串）。
+
+    每页只算一次，避免逐张图片 abspath/relpath。
+    """
+    assets_abs = os.path.abspath(assets_dir)
+    try:
+        rel = os.path.relpath(assets_abs, start=os.path.abspath(md_dir or "."))
+    except ValueError:
+        # Windows 跨盘符时 relpath 抛 ValueError，回退为绝对路径
+        rel = assets_abs
+    rel = rel.replace("\\", "/")
+    if rel == ".":
+        return ""
+    return rel.rstrip("/") + "/"
+
+
+def _image_filename(
+    idx: int,
+    img_url: str,
+    content_type: Optional[str],
+    sniffed_ext: Optional[str],
+    assets_dir: str,
+    idx_width: int,
+) -> str:
+    """按编号、URL 文件名与内容类型生成 assets 目录下的文件名（编号前缀保证唯一）。"""
+    parsed_img = urlparse(img_url)
+    base = os.path.basename(parsed_img.path.rstrip("/"))
+    base = unquote(base) or f"image-{idx}"
+    name_root, name_ext = os.path.splitext(base)
+
+    if (not name_ext) or (name_ext.lower() not in _KNOWN_IMAGE_EXTS):
+        detected = ext_from_content_type(content_type) or sniffed_ext
+        if detected:
+            name_ext = detected
+        elif not name_ext:
+            name_ext = ".bin"
+
+    safe_root = _sanitize_filename_part(name_root)
+    filename = f"{idx:0{idx_width}d}-{safe_root}{name_ext}"
+    return _safe_path_length(assets_dir, filename)
+
+
+def _stage_image(
+    idx: int,
+    img_url: str,
+    fetched: Tuple[str, Optional[str], bytes, Optional[str]],
+    staged: _StagedImages,
+) -> None:
+    """按内容摘要暂存 worker 写好的临时文件；内容与已暂存的图片完全相同时丢弃新文件、共用旧文件。
+
+    同一张图常以不同 URL 出现（srcset 与 src、带不同统计参数的 CDN 链接），
+    按内容摘要去重可省去重复占用磁盘。
+    """
+    tmp_path, content_type, digest, sniffed_ext = fetched
+    entry = staged.get(digest)
+    if entry is None:
+        staged[digest] = (tmp_path, [(idx, img_url, content_type, sniffed_ext)])
+    else:
+        _remove_quietly(tmp_path)
+        entry[1].append((idx, img_url, content_type, sniffed_ext))
+
+
+def _finalize_images(
+    staged: _StagedImages,
+    assets_dir: str,
+    assets_rel: str,
+    idx_width: int,
+    best_effort: bool,
+) -> Dict[str, str]:
+    """全部下载结束后统一命名：每份内容取共用它的最小编号生成文件名，一次 os.replace 落位。
+
+    文件名只在这里确定一次，结果与完成顺序无关，也无需事后改名。
+    *assets_dir* 应为绝对路径，*assets_rel* 为 ``_assets_rel_prefix`` 预先算好的前缀。
+    返回按原始 idx 排序的 ``{img_url: 相对路径}``。
+    """
+    saved: Dict[int, Tuple[str, str]] = {}
+    for tmp_path, members in staged.values():
+        idx, img_url, content_type, sniffed_ext = min(members)
+        filename = _image_filename(idx, img_url, content_type, sniffed_ext, assets_dir, idx_width)
+        try:
+            os.replace(tmp_path, os.path.join(assets_dir, filename))
+        except OSError as e:
+            if not best_effort:
+                raise
+            _remove_quietly(tmp_path)
+            print(f"警告：图片保存失败，已跳过：{img_url}\n  - 错误：{e}", file=sys.stderr)
+            continue
+        rel = assets_rel + filename
+        for i, url, _, _ in members:
+            saved[i] = (url, rel)
+    return {img_url: rel for _, (img_url, rel) in sorted(saved.items())}
+
+
 def download_images(
     session: requests.Session,
     image_urls: Sequence[str],
@@ -203,130 +492,67 @@ def download_images(
     page_url: str,
     redact_urls: bool = True,
     max_image_bytes: int = _DEFAULT_MAX_IMAGE_BYTES,
+    workers: int = _DEFAULT_IMAGE_WORKERS,
 ) -> Dict[str, str]:
     os.makedirs(assets_dir, exist_ok=True)
-    url_to_local: Dict[str, str] = {}
     anon_session = _create_anonymous_image_session(session)
-    referer = page_url
     max_bytes: Optional[int] = max_image_bytes if (max_image_bytes and max_image_bytes > 0) else None
-    known_image_exts = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".avif", ".bmp", ".ico"}
+    assets_abs = os.path.abspath(assets_dir)
+    assets_rel = _assets_rel_prefix(assets_abs, md_dir)
 
+    jobs: List[Tuple[int, str]] = []
     for idx, img_url in enumerate(image_urls, start=1):
         if not img_url:
             continue
-        parsed_img = urlparse(img_url)
-        if parsed_img.scheme not in ("http", "https"):
+        if urlparse(img_url).scheme not in ("http", "https"):
             continue
+        jobs.append((idx, img_url))
+    if not jobs:
+        return {}
 
-        last_err: Optional[Exception] = None
-        r: Optional[requests.Response] = None
-        for attempt in range(1, retries + 1):
-            try:
-                r = _safe_image_get(
-                    img_url=img_url,
+    # 图片下载是纯网络 I/O：worker 并发把响应体流式写入临时文件，
+    # 主线程按完成顺序做摘要去重，全部结束后再统一改名；最终映射按原始 idx 排序，
+    # 保证与串行实现的输出顺序一致。
+    # worker 只读取 session 配置（不修改 headers/cookies），共享同一连接池。
+    jobs = _interleave_by_host(jobs)
+    slots = _host_slots(jobs, _MAX_FETCHES_PER_HOST)
+    staged: _StagedImages = {}
+    futures: Dict[Future, Tuple[int, str]] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for idx, img_url in jobs:
+                future = executor.submit(
+                    _fetch_image_in_slot,
+                    slots[_host_of(img_url)],
+                    img_url,
                     page_url=page_url,
                     session=session,
                     anon_session=anon_session,
                     timeout_s=timeout_s,
-                    referer=referer,
+                    retries=retries,
+                    referer=page_url,
                     redact_urls=redact_urls,
+                    max_bytes=max_bytes,
+                    assets_dir=assets_abs,
                 )
-                r.raise_for_status()
-                break
-            except Exception as e:
-                last_err = e
-                if r is not None:
-                    try:
-                        r.close()
-                    except Exception:
-                        pass
-                    r = None
-                if attempt >= retries:
-                    break
-                time.sleep(min(2.0, 0.4 * attempt))
-
-        if r is None:
-            if best_effort:
-                print(f"警告：图片下载失败，已跳过：{img_url}\n  - 错误：{last_err}", file=sys.stderr)
-                continue
-            raise last_err or RuntimeError("image download failed")
-
-        try:
-            base = os.path.basename(parsed_img.path.rstrip("/"))
-            base = unquote(base) or f"image-{idx}"
-            name_root, name_ext = os.path.splitext(base)
-
-            it = r.iter_content(chunk_size=1024 * 64)
-            head = b""
-            for chunk in it:
-                if chunk:
-                    head = chunk
-                    break
-
-            if (not name_ext) or (name_ext.lower() not in known_image_exts):
-                detected = ext_from_content_type(r.headers.get("Content-Type") if r else None) or sniff_ext(head or b"")
-                if detected:
-                    name_ext = detected
-                elif not name_ext:
-                    name_ext = ".bin"
-
-            safe_root = _sanitize_filename_part(name_root)
-            filename = f"{idx:02d}-{safe_root}{name_ext}"
-            filename = _safe_path_length(assets_dir, filename)
-            local_path = os.path.join(assets_dir, filename)
-            tmp_path = local_path + ".part"
-
-            size = 0
-            try:
-                with open(tmp_path, "wb") as f:
-                    if head:
-                        f.write(head)
-                        size += len(head)
-                        if max_bytes is not None and size > max_bytes:
-                            raise RuntimeError(f"图片过大（>{max_bytes} bytes）")
-                    for chunk in it:
-                        if not chunk:
-                            continue
-                        size += len(chunk)
-                        if max_bytes is not None and size > max_bytes:
-                            raise RuntimeError(f"图片过大（>{max_bytes} bytes）")
-                        f.write(chunk)
-                os.replace(tmp_path, local_path)
-            finally:
-                if os.path.exists(tmp_path):
-                    try:
-                        os.remove(tmp_path)
-                    except OSError:
-                        pass
-
-            # 空响应体（200 但 0 字节）视为失败，不落盘空文件
-            if size == 0:
+                futures[future] = (idx, img_url)
+            for future in as_completed(futures):
+                # 取出即从 futures 移除：中止时 _discard_fetched 只需清理尚未取走的临时文件
+                idx, img_url = futures.pop(future)
                 try:
-                    os.remove(local_path)
-                except OSError:
-                    pass
-                raise RuntimeError("空响应体（0 字节），服务端返回了空内容")
-        except Exception as e:
-            if best_effort:
-                print(f"警告：图片保存失败，已跳过：{img_url}\n  - 错误：{e}", file=sys.stderr)
-                continue
-            raise
-        finally:
-            try:
-                r.close()
-            except Exception:
-                pass
-
-        local_abs = os.path.abspath(local_path)
-        md_dir_abs = os.path.abspath(md_dir or ".")
-        try:
-            rel = os.path.relpath(local_abs, start=md_dir_abs)
-        except ValueError:
-            # Windows 跨盘符时 relpath 抛 ValueError，回退为绝对路径
-            rel = local_abs
-        url_to_local[img_url] = rel.replace("\\", "/")
-
-    return url_to_local
+                    fetched = future.result()
+                except Exception as e:
+                    if best_effort:
+                        print(f"警告：图片下载失败，已跳过：{img_url}\n  - 错误：{e}", file=sys.stderr)
+                        continue
+                    for f in futures:
+                        f.cancel()
+                    raise
+                _stage_image(idx, img_url, fetched, staged)
+        return _finalize_images(staged, assets_abs, assets_rel, 2, best_effort)
+    except BaseException:
+        _discard_fetched(futures, staged)
+        raise
 
 
 def batch_download_images(
@@ -341,25 +567,21 @@ def batch_download_images(
     *,
     redact_urls: bool = True,
     max_image_bytes: int = _DEFAULT_MAX_IMAGE_BYTES,
+    workers: int = _DEFAULT_IMAGE_WORKERS,
 ) -> Dict[str, str]:
-    all_image_urls: List[str] = []
-    seen: set = set()
-    for result in results:
-        if result.success:
-            for url in result.image_urls:
-                if url not in seen:
-                    all_image_urls.append(url)
-                    seen.add(url)
+    # dict.fromkeys 保序去重，逐元素判重在 C 层完成
+    all_image_urls: List[str] = list(
+        dict.fromkeys(url for result in results if result.success for url in result.image_urls)
+    )
 
     if not all_image_urls:
         return {}
 
     os.makedirs(assets_dir, exist_ok=True)
-    url_to_local: Dict[str, str] = {}
-    total = len(all_image_urls)
     anon_session = _create_anonymous_image_session(session)
     max_bytes: Optional[int] = max_image_bytes if (max_image_bytes and max_image_bytes > 0) else None
-    known_image_exts = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".avif", ".bmp", ".ico"}
+    assets_abs = os.path.abspath(assets_dir)
+    assets_rel = _assets_rel_prefix(assets_abs, md_dir)
 
     img_referer: Dict[str, str] = {}
     for result in results:
@@ -369,128 +591,65 @@ def batch_download_images(
             if u and u not in img_referer:
                 img_referer[u] = result.url
 
+    jobs: List[Tuple[int, str]] = []
     for idx, img_url in enumerate(all_image_urls, start=1):
-        if progress_callback:
-            progress_callback(idx, total, img_url)
-
         if not img_url:
             continue
-        parsed_img = urlparse(img_url)
-        if parsed_img.scheme not in ("http", "https"):
+        if urlparse(img_url).scheme not in ("http", "https"):
             continue
-
-        referer_url = img_referer.get(img_url) or ""
-        referer = referer_url
-        last_err: Optional[Exception] = None
-        r: Optional[requests.Response] = None
-
-        for attempt in range(1, retries + 1):
-            try:
-                r = _safe_image_get(
-                    img_url=img_url,
-                    page_url=referer_url or "",
+        jobs.append((idx, img_url))
+
+    # 进度按实际提交的下载任务计数（跳过的空串/非 http(s) URL 不计入）
+    total = len(jobs)
+    jobs = _interleave_by_host(jobs)
+    slots = _host_slots(jobs, _MAX_FETCHES_PER_HOST)
+    staged: _StagedImages = {}
+    done = 0
+    futures: Dict[Future, Tuple[int, str]] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for idx, img_url in jobs:
+                referer_url = img_referer.get(img_url) or ""
+                future = executor.submit(
+                    _fetch_image_in_slot,
+                    slots[_host_of(img_url)],
+                    img_url,
+                    page_url=referer_url,
                     session=session,
                     anon_session=anon_session,
                     timeout_s=timeout_s,
-                    referer=referer,
+                    retries=retries,
+                    referer=referer_url,
                     redact_urls=redact_urls,
+                    max_bytes=max_bytes,
+                    assets_dir=assets_abs,
                 )
-                r.raise_for_status()
-                break
-            except Exception as e:
-                last_err = e
-                if r is not None:
-                    try:
-                        r.close()
-                    except Exception:
-                        pass
-                    r = None
-                if attempt >= retries:
-                    break
-                time.sleep(min(2.0, 0.4 * attempt))
-
-        if r is None:
-            if best_effort:
-                print(f"  警告：图片下载失败，已跳过：{img_url[:60]}...", file=sys.stderr)
-                continue
-            raise last_err or RuntimeError("image download failed")
-
-        try:
-            base = os.path.basename(parsed_img.path.rstrip("/"))
-            base = unquote(base) or f"image-{idx}"
-            name_root, name_ext = os.path.splitext(base)
-
-            it = r.iter_content(chunk_size=1024 * 64)
-            head = b""
-            for chunk in it:
-                if chunk:
-                    head = chunk
-                    break
-
-            if (not name_ext) or (name_ext.lower() not in known_image_exts):
-                detected = ext_from_content_type(r.headers.get("Content-Type") if r else None) or sniff_ext(head or b"")
-                if detected:
-                    name_ext = detected
-                elif not name_ext:
-                    name_ext = ".bin"
-
-            safe_root = _sanitize_filename_part(name_root)
-            filename = f"{idx:03d}-{safe_root}{name_ext}"
-            filename = _safe_path_length(assets_dir, filename)
-            local_path = os.path.join(assets_dir, filename)
-            tmp_path = local_path + ".part"
-
-            size = 0
-            try:
-                with open(tmp_path, "wb") as f:
-                    if head:
-                        f.write(head)
-                        size += len(head)
-                        if max_bytes is not None and size > max_bytes:
-                            raise RuntimeError(f"图片过大（>{max_bytes} bytes）")
-                    for chunk in it:
-                        if not chunk:
-                            continue
-                        size += len(chunk)
-                        if max_bytes is not None and size > max_bytes:
-                            raise RuntimeError(f"图片过大（>{max_bytes} bytes）")
-                        f.write(chunk)
-                os.replace(tmp_path, local_path)
-            finally:
-                if os.path.exists(tmp_path):
-                    try:
-                        os.remove(tmp_path)
-                    except OSError:
-                        pass
-
-            # 空响应体（200 但 0 字节）视为失败，不落盘空文件
-            if size == 0:
+                futures[future] = (idx, img_url)
+            for future in as_completed(futures):
+                # 取出即从 futures 移除：中止时 _discard_fetched 只需清理尚未取走的临时文件
+                idx, img_url = futures.pop(future)
                 try:
-                    os.remove(local_path)
-                except OSError:
-                    pass
-                raise RuntimeError("空响应体（0 字节），服务端返回了空内容")
-        except Exception as e:
-            if best_effort:
-                print(f"  警告：图片保存失败，已跳过：{img_url[:60]}...\n    错误：{e}", file=sys.stderr)
-                continue
-            raise
-        finally:
-            try:
-                r.close()
-            except Exception:
-                pass
-
-        local_abs = os.path.abspath(local_path)
-        md_dir_abs = os.path.abspath(md_dir or ".")
-        try:
-            rel = os.path.relpath(local_abs, start=md_dir_abs)
-        except ValueError:
-            # Windows 跨盘符时 relpath 抛 ValueError，回退为绝对路径
-            rel = local_abs
-        url_to_local[img_url] = rel.replace("\\", "/")
-
-    return url_to_local
+                    fetched = future.result()
+                except Exception:
+                    if not best_effort:
+                        for f in futures:
+                            f.cancel()
+                        raise
+                    print(f"  警告：图片下载失败，已跳过：{img_url[:60]}...", file=sys.stderr)
+                else:
+                    _stage_image(idx, img_url, fetched, staged)
+                # 该图片处理完（暂存或跳过）后再汇报进度
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, img_url)
+        return _finalize_images(staged, assets_abs, assets_rel, 3, best_effort)
+    except BaseException:
+        _discard_fetched(futures, staged)
+        raise
+
+
+_MD_IMG_REF_RE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)')
+_HTML_IMG_SRC_RE = re.compile(r'(<img\b[^>]*\bsrc=["\'])([^"\']+)(["\'])', re.IGNORECASE)
 
 
 def replace_image_urls_in_markdown(md_content: str, url_to_local: Dict[str, str]) -> str:
@@ -498,8 +657,6 @@ def replace_image_urls_in_markdown(md_content: str, url_to_local: Dict[str, str]
         return md_content
 
     result = md_content
-    md_img_pattern = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)')
-    html_img_pattern = re.compile(r'(<img\b[^>]*\bsrc=["\'])([^"\']+)(["\'])', re.IGNORECASE)
 
     def _lookup_local(url: str) -> Optional[str]:
         candidates = [url]
@@ -530,6 +687,6 @@ def replace_image_urls_in_markdown(md_content: str, url_to_local: Dict[str, str]
             return m.group(0)
         return f"{m.group(1)}{local}{m.group(3)}"
 
-    result = md_img_pattern.sub(_replace_md_img, result)
-    result = html_img_pattern.sub(_replace_html_img, result)
+    result = _MD_IMG_REF_RE.sub(_replace_md_img, result)
+    result = _HTML_IMG_SRC_RE.sub(_replace_html_img, result)
     return result
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import functools
 import html as htmllib
 import re
 from html.parser import HTMLParser
-from typing import Dict, List, Optional, Sequence, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from urllib.parse import quote, unquote, urljoin, urlparse
 
 from .security import redact_url
@@ -20,17 +21,32 @@ def _safe_markdown_url(url: str) -> str:
     return url.replace(" ", "%20").replace("(", "%28").replace(")", "%29")
 
 
+# 同一页面的 srcset 变体、重复引用会反复判定同一 URL
+@functools.lru_cache(maxsize=8192)
 def is_probable_icon(url: str) -> bool:
+    # 几个固定子串用 in 逐个判断，比正则多选分支快约一倍
     low = url.lower()
     return (
-        "favicon" in low
+        low.endswith(".ico")
+        or "favicon" in low
         or "/icon/" in low
-        or low.endswith(".ico")
         or "pinned-octocat" in low
         or "/apple-touch-icon" in low
     )
 
 
+# 页面内 logo、图标、srcset 变体会重复出现同一 src，base_url 在单次转换中不变
+@functools.lru_cache(maxsize=2048)
+def _join_unescape(base: str, raw: str) -> str:
+    return urljoin(base, htmllib.unescape(raw))
+
+
+# 目录、页脚等处的链接会反复指向同几个地址；urljoin 为纯 Python，每次都要重新解析 base
+@functools.lru_cache(maxsize=4096)
+def _join_href(base: str, href: str) -> str:
+    return urljoin(base, href)
+
+
 def _is_cjk(ch: str) -> bool:
     """判断单个字符是否为 CJK 字符（中文/日文/韩文）。"""
     if not ch:
@@ -44,6 +60,12 @@ def _is_cjk(ch: str) -> bool:
     )
 
 
+def _first_srcset(srcset: str) -> str:
+    """取 srcset 第一项的 URL（忽略描述符）。"""
+    head = srcset.partition(",")[0]
+    return head.strip().partition(" ")[0]
+
+
 def _extract_img_src(attrs: Dict[str, Optional[str]]) -> str:
     """从 img/picture 的属性中提取真实图片 URL。
 
@@ -64,11 +86,109 @@ def _extract_img_src(attrs: Dict[str, Optional[str]]) -> str:
     if not src:
         srcset = attrs.get("srcset")
         if srcset:
-            src = srcset.split(",")[0].strip().split(" ")[0]
+            src = _first_srcset(srcset)
     return src or ""
 
 
 _UNSAFE_URL_RE = re.compile(r"^(?:javascript|vbscript|file):", re.IGNORECASE)
+_INLINE_WS_RE = re.compile(r"[ \t\r\f\v]+")
+# 代码语言名只含 ASCII 字符，显式声明 re.ASCII
+_LANG_CLASS_RE = re.compile(r"^(?:language|lang)[-_]([A-Za-z0-9_+.-]+)$", re.ASCII)
+_FENCE_LANG_RE = re.compile(r"^[A-Za-z0-9_+.-]+$", re.ASCII)
+_URL_CTRL_CHARS_RE = re.compile(r"[\x00-\x20]+")
+_SCRIPT_URL_RE = re.compile(r"^(?:javascript|vbscript):")
+# 表格单元格清理（每个 th/td 结束时执行）
+_CELL_HSPACE_RE = re.compile(r"[ \t\f\v]+")
+# 含换行或 <br> 的空白串整体折叠为一个 <br>（等价于逐步替换 \n→<br>、去 <br> 两侧空白、合并连续 <br>）
+_CELL_BREAK_RUN_RE = re.compile(r"\s*(?:(?:\n|<br>)\s*)+", re.IGNORECASE)
+_CELL_BR_EDGE_RE = re.compile(r"^(?:<br>)+|(?:<br>)+$", re.IGNORECASE)
+
+
+def _escape_text(data: str) -> str:
+    """等价于 ``html.escape(data, quote=False)``，不含 & < > 时直接返回原串。
+
+    html.escape 无论有无需要转义的字符都要做三次 replace；正文文本节点绝大多数
+    不含这三个字符，三次 in 判断即可跳过（长文本节点快一个数量级）。
+    """
+    if "&" in data or "<" in data or ">" in data:
+        return htmllib.escape(data, quote=False)
+    return data
+
+
+def _collapse_inline_ws(text: str) -> str:
+    """把行内空白串折叠为单个空格（保留换行）。
+
+    单个空格替换后不变，只有出现连续空格或 \\t\\r\\f\\v 时才需要正则；
+    多数文本节点走前面的子串判断即可返回，省去一次正则替换。
+    """
+    if "  " in text or "\t" in text or "\r" in text or "\f" in text or "\v" in text:
+        return _INLINE_WS_RE.sub(" ", text)
+    return text
+
+
+# 常见代码语言名（class 直接写语言名时识别，如 <code class="python">）
+_KNOWN_CODE_LANGS = frozenset({
+    "bash", "c", "cpp", "csharp", "css", "go", "html", "java", "javascript",
+    "js", "json", "kotlin", "perl", "php", "python", "py", "ruby", "rust",
+    "scala", "shell", "sh", "sql", "swift", "toml", "typescript", "ts", "xml",
+    "yaml", "yml",
+})
+
+
+# 同一页面的代码块通常共用同一组 class（如 "hljs language-python"），按 class 元组缓存
+@functools.lru_cache(maxsize=256)
+def _code_language_from_classes(classes: Tuple[str, ...]) -> str:
+    for c in classes:
+        m = _LANG_CLASS_RE.match(c)
+        if m:
+            return m.group(1)
+    for c in classes:
+        low = c.lower()
+        if low in _KNOWN_CODE_LANGS:
+            return low
+    return ""
+
+
+# 同一页面的代码块语言名取值很少（python/js/bash…），按原始字符串缓存清洗结果
+@functools.lru_cache(maxsize=256)
+def _sanitize_fence_language_cached(lang: str) -> str:
+    parts = lang.strip().split()
+    lang = parts[0] if parts else ""
+    if not lang:
+        return ""
+    if not _FENCE_LANG_RE.match(lang):
+        return ""
+    return lang
+
+
+def _normalize_cell(parts: Sequence[str]) -> str:
+    """合并单元格片段：折叠空白，换行/<br> 串归一为单个 <br>，并去掉首尾 <br>。"""
+    cell = "".join(parts)
+    if "\r" in cell:
+        cell = cell.replace("\r\n", "\n").replace("\r", "\n")
+    cell = _CELL_HSPACE_RE.sub(" ", cell)
+    # 多数单元格是单行纯文本，无需处理换行/<br>
+    if "\n" in cell or "<" in cell:
+        cell = _CELL_BREAK_RUN_RE.sub("<br>", cell)
+        cell = _CELL_BR_EDGE_RE.sub("", cell)
+    return cell.strip()
+
+
+def _md_table_row(cells: List[str], cols: int) -> str:
+    """渲染一行 Markdown 表格（补齐到 cols 列），单元格内的 | 转义为 \\|。"""
+    if len(cells) < cols:
+        cells = cells + [""] * (cols - len(cells))
+    row = " | ".join(cells)
+    # 竖线数恰等于分隔符数说明单元格内没有 |，免去逐格 replace
+    if row.count("|") != cols - 1:
+        row = " | ".join([c.replace("|", r"\|") for c in cells])
+    return "| " + row + " |"
+
+
+# 表头分隔行只取决于列数，页面内多张表常列数相同
+@functools.lru_cache(maxsize=64)
+def _md_table_separator(cols: int) -> str:
+    return "| " + " | ".join(["---"] * cols) + " |"
 
 
 def _is_unsafe_link_url(raw: str) -> bool:
@@ -79,7 +199,7 @@ def _is_unsafe_link_url(raw: str) -> bool:
     """
     if not raw:
         return False
-    v_stripped = re.sub(r"[\x00-\x20]+", "", raw).lower()
+    v_stripped = _URL_CTRL_CHARS_RE.sub("", raw).lower()
     if _UNSAFE_URL_RE.match(v_stripped):
         return True
     if v_stripped.startswith("data:"):
@@ -119,6 +239,12 @@ SKIP_TAGS = {
     "audio",
 }
 
+# 直接跳过的标签（含交互控件）；script 的 math/tex 例外在 _should_skip 中先行处理
+_SKIP_OR_INTERACTIVE_TAGS = frozenset(SKIP_TAGS | {"button"})
+
+# Ghost 等平台的媒体卡片 class 前缀
+_KG_MEDIA_PREFIXES = ("kg-audio-", "kg-file-")
+
 # 块级标签：用于检测未闭合的行内元素（如 katex span）是否越界
 _BLOCK_LEVEL_TAGS = {
     "p", "div", "h1", "h2", "h3", "h4", "h5", "h6",
@@ -129,13 +255,71 @@ _BLOCK_LEVEL_TAGS = {
 }
 
 
-def _class_list(attrs: Dict[str, Optional[str]]) -> List[str]:
+# 同一页面中导航、表格单元格等重复属性组合很多，按属性元组缓存序列化结果
+@functools.lru_cache(maxsize=4096)
+def _attrs_to_str_cached(attrs_list: Tuple[Tuple[str, Optional[str]], ...]) -> str:
+    parts = []
+    for name, value in attrs_list:
+        safe_name = (name or "").strip()
+        if not safe_name:
+            continue
+        low = safe_name.lower()
+
+        if low.startswith("on"):
+            continue
+
+        if value is not None and low in ("href", "src", "xlink:href", "srcset"):
+            v = str(value).strip()
+            # 浏览器会忽略 URL 中的 tab/newline 等控制字符，
+            # 因此 java\tscript: 等变体也需拦截
+            v_stripped = _URL_CTRL_CHARS_RE.sub("", v).lower()
+            if _SCRIPT_URL_RE.match(v_stripped):
+                continue
+            # data: 协议在 href 中可执行脚本（data:text/html），
+            # 在 src 中仅 img/data:image 安全
+            if low == "href" and v_stripped.startswith("data:"):
+                continue
+            if low in ("src", "xlink:href") and v_stripped.startswith("file:"):
+                continue
+
+        if value is None:
+            parts.append(safe_name)
+        else:
+            escaped = htmllib.escape(str(value), quote=True)
+            parts.append(f'{safe_name}="{escaped}"')
+    return " ".join(parts)
+
+
+# 行内文本拼接时的空格判定表（按 ASCII 码索引）：
+# 前一字符在此集合中时不补空格 / 后一片段以此集合中字符开头时不补空格
+_NO_SPACE_AFTER = bytes(1 if chr(c) in "\n ([*`_" else 0 for c in range(128))
+_NO_SPACE_BEFORE = bytes(1 if chr(c) in " \n.,:;)]" else 0 for c in range(128))
+
+# 各嵌套层级的无序列表项前缀（缩进 + "- "），免去每个 <li> 拼接缩进
+_UL_ITEM_PREFIXES = tuple("  " * depth + "- " for depth in range(8))
+
+# 标题标签 → Markdown 前缀（"# " ~ "###### "），避免每个标题现拼字符串
+_HEADING_PREFIXES = {f"h{n}": "#" * n + " " for n in range(1, 7)}
+
+
+def _class_list(attrs: Dict[str, Optional[str]]) -> Tuple[str, ...]:
     cls = attrs.get("class")
     if not cls:
-        return []
+        return ()
     if isinstance(cls, str):
-        return [c for c in cls.split() if c]
-    return [str(cls)]
+        return tuple(cls.split())
+    return (str(cls),)
+
+
+# HTMLToMarkdown._data_mode 的状态位
+_MODE_SKIP = 1
+_MODE_ANNOT = 2
+_MODE_MATH = 4
+_MODE_KATEX = 8
+_MODE_TABLE = 16
+_MODE_PRE = 32
+_MODE_CODE = 64
+_MODE_LINK = 128
 
 
 class HTMLToMarkdown(HTMLParser):
@@ -144,10 +328,20 @@ class HTMLToMarkdown(HTMLParser):
         self.base_url = base_url
         self.url_to_local = url_to_local
         self.keep_html = keep_html
+        # 输出片段列表，结束时一次 "".join。实测 CPython 下 list.append 比
+        # io.StringIO.write 快约 2 倍（片段多为 "\n"、"**" 这类短串），故保留列表
         self.out: List[str] = []
+        self._out_append = self.out.append
+        # out 末尾若干字符的滚动副本：探测结尾时无需反复 join 列表
+        self._tail_str: str = ""
 
         self.skip_stack: List[str] = []
+        # 文本路由状态位图：下列任一状态生效时置位。handle_data 面对最常见的
+        # 正文文本只需判断一次 _data_mode，而不是逐个检查十来个属性
+        self._data_mode = 0
 
+        # 下列 *_buf / *_text 暂存列表只在此创建一次，元素开闭时 clear() 复用，
+        # 避免每个链接、单元格、代码片段都新建并丢弃一个列表
         self.in_heading = False
         self.heading_out_start: Optional[int] = None
         self.heading_text: List[str] = []
@@ -164,7 +358,11 @@ class HTMLToMarkdown(HTMLParser):
         self.annotation_display = False
         self.annotation_buf: List[str] = []
 
-        self.tag_stack: List[Tuple[str, bool, bool]] = []
+        # 已打开的非 void 标签名；结束标签按名回溯匹配，兼容错误嵌套
+        self.tag_stack: List[str] = []
+        # 仅 katex span 入栈：(在 tag_stack 中的位置, 是否 katex-display)。
+        # katex 标签占比很小，不必给每个标签都附带标志位
+        self._katex_stack: List[Tuple[int, bool]] = []
         self.katex_depth = 0
         self.katex_display_depth = 0
 
@@ -205,154 +403,97 @@ class HTMLToMarkdown(HTMLParser):
 
     @staticmethod
     def _attrs_to_str(attrs_list: Sequence[Tuple[str, Optional[str]]]) -> str:
-        parts = []
-        for name, value in attrs_list:
-            safe_name = (name or "").strip()
-            if not safe_name:
-                continue
-            low = safe_name.lower()
-
-            if low.startswith("on"):
-                continue
-
-            if value is not None and low in ("href", "src", "xlink:href", "srcset"):
-                v = str(value).strip()
-                # 浏览器会忽略 URL 中的 tab/newline 等控制字符，
-                # 因此 java\tscript: 等变体也需拦截
-                v_stripped = re.sub(r"[\x00-\x20]+", "", v).lower()
-                if re.match(r"^(?:javascript|vbscript):", v_stripped):
-                    continue
-                # data: 协议在 href 中可执行脚本（data:text/html），
-                # 在 src 中仅 img/data:image 安全
-                if low == "href" and v_stripped.startswith("data:"):
-                    continue
-                if low in ("src", "xlink:href") and v_stripped.startswith("file:"):
-                    continue
-
-            if value is None:
-                parts.append(safe_name)
-            else:
-                escaped = htmllib.escape(str(value), quote=True)
-                parts.append(f'{safe_name}="{escaped}"')
-        return " ".join(parts)
+        return _attrs_to_str_cached(tuple(attrs_list))
 
     @staticmethod
-    def _extract_code_language(attrs: Dict[str, Optional[str]]) -> str:
+    def _extract_code_language(attrs: Dict[str, Optional[str]], classes: Sequence[str]) -> str:
         for key in ("data-language", "data-lang", "lang"):
             val = (attrs.get(key) or "").strip()
             if val:
                 return val.split()[0]
 
-        classes = _class_list(attrs)
-        for c in classes:
-            m = re.match(r"^(?:language|lang)[-_]([A-Za-z0-9_+.-]+)$", c)
-            if m:
-                return m.group(1)
-
-        known = {
-            "bash",
-            "c",
-            "cpp",
-            "csharp",
-            "css",
-            "go",
-            "html",
-            "java",
-            "javascript",
-            "js",
-            "json",
-            "kotlin",
-            "perl",
-            "php",
-            "python",
-            "py",
-            "ruby",
-            "rust",
-            "scala",
-            "shell",
-            "sh",
-            "sql",
-            "swift",
-            "toml",
-            "typescript",
-            "ts",
-            "xml",
-            "yaml",
-            "yml",
-        }
-        for c in classes:
-            low = c.lower()
-            if low in known:
-                return low
-
-        return ""
+        return _code_language_from_classes(tuple(classes))
 
     @staticmethod
     def _sanitize_fence_language(lang: str) -> str:
-        parts = (lang or "").strip().split()
-        lang = parts[0] if parts else ""
-        if not lang:
-            return ""
-        if not re.match(r"^[A-Za-z0-9_+.-]+$", lang):
-            return ""
-        return lang
+        return _sanitize_fence_language_cached(lang or "")
 
-    def _tail(self) -> str:
-        return "".join(self.out[-8:]) if self.out else ""
+    def _capture_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
+        # 按片段写入捕获缓冲，避免每个标签构造一次 f-string 临时串
+        attr_str = self._attrs_to_str(attrs_list)
+        if attr_str:
+            self.table_capture_buf.extend(("<", tag, " ", attr_str, ">"))
+        else:
+            self.table_capture_buf.extend(("<", tag, ">"))
+
+    def _push(self, s: str) -> None:
+        self._out_append(s)
+        # 长片段（代码块/表格）直接取自身末尾，免去与旧尾部拼接的整段复制
+        if len(s) >= 8:
+            self._tail_str = s[-8:]
+        else:
+            self._tail_str = (self._tail_str + s)[-8:]
 
     def _ensure_blank_line(self) -> None:
         if not self.out:
             return
-        tail = self._tail()
+        tail = self._tail_str
         if not tail.endswith("\n\n"):
             if tail.endswith("\n"):
-                self.out.append("\n")
+                self._push("\n")
             else:
-                self.out.append("\n\n")
+                self._push("\n\n")
 
     def _append_text(self, text: str) -> None:
         if not text:
             return
-        text = re.sub(r"[ \t\r\f\v]+", " ", text)
-        if self.out:
-            tail = self._tail()
-            if tail.endswith(("**", "*", "`")):
-                text = text.lstrip()
-        if self.out:
-            prev = self._tail()[-1:]
-            if (
-                prev
-                and prev not in ("\n", " ", "(", "[", "*", "`", "_")
-                and text[:1] not in (" ", "\n", ".", ",", ":", ";", ")", "]")
-                # 两侧均为 CJK 字符时不插入空格（避免割裂中文/日文/韩文文本）
-                and not (_is_cjk(prev) and _is_cjk(text[:1]))
-            ):
-                self.out.append(" ")
-        self.out.append(text)
+        text = _collapse_inline_ws(text)
+        tail = self._tail_str
+        if not tail:
+            self._push(text)
+            return
+        if tail.endswith(("*", "`")):
+            text = text.lstrip()
+        p = ord(tail[-1])
+        q = ord(text[0]) if text else 0
+        if (
+            (p >= 128 or not _NO_SPACE_AFTER[p])
+            and (q >= 128 or not _NO_SPACE_BEFORE[q])
+            # 两侧均为 CJK 字符时不插入空格（避免割裂中文/日文/韩文文本）
+            and not (p >= 128 and q >= 128 and _is_cjk(tail[-1]) and _is_cjk(text[0]))
+        ):
+            # 分隔空格与文本合为一个片段，少一次 _push
+            text = " " + text
+        self._push(text)
+
+    def _cell_break(self) -> None:
+        """单元格内换行：末尾片段已是 <br> 时不重复追加。"""
+        buf = self.cell_buf
+        if buf:
+            last = buf[-1]
+            # 多数片段是普通文本，先用 '<' 排除，免去 strip().lower() 的两次拷贝
+            if "<" not in last or last.strip().lower() != "<br>":
+                buf.append("<br>")
 
     def _table_append(self, text: str) -> None:
         if not text:
             return
-        text = re.sub(r"[ \t\r\f\v]+", " ", text)
+        text = _collapse_inline_ws(text)
         self.cell_buf.append(text)
 
-    def _should_skip(self, tag: str, attrs: Dict[str, Optional[str]]) -> bool:
+    def _should_skip(self, tag: str, attrs: Dict[str, Optional[str]], classes: Sequence[str]) -> bool:
         if tag == "script":
             t = (attrs.get("type") or "").strip().lower()
             if t.startswith("math/tex"):
                 return False
-        if tag in SKIP_TAGS:
+        if tag in _SKIP_OR_INTERACTIVE_TAGS:
             return True
 
-        classes = _class_list(attrs)
         if classes and tag not in ("figure", "figcaption"):
-            if any(c.startswith(("kg-video-", "kg-audio-", "kg-file-")) for c in classes):
-                return True
-            if any("kg-video" in c for c in classes):
-                return True
-
-        if tag in ("button",):
-            return True
+            # "kg-video-" 前缀已被 "kg-video" 子串覆盖，合并为单次遍历
+            for c in classes:
+                if "kg-video" in c or c.startswith(_KG_MEDIA_PREFIXES):
+                    return True
 
         return False
 
@@ -360,49 +501,46 @@ class HTMLToMarkdown(HTMLParser):
         if tag in VOID_TAGS:
             return
         self.skip_stack.append(tag)
+        self._data_mode |= _MODE_SKIP
 
     def handle_starttag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
-        tag = tag.lower()
-        attrs = dict(attrs_list)
+        # HTMLParser 回调前已把标签名与属性名转为小写，这里不再重复 lower()
+        # 多数标签不带属性，避免为空属性列表构造 dict
+        attrs: Dict[str, Optional[str]] = dict(attrs_list) if attrs_list else {}
+        # class 列表每个标签只拆分一次，供 katex 检测、跳过判定与代码语言识别共用
+        classes = _class_list(attrs)
 
         if tag not in VOID_TAGS:
-            is_katex = False
-            is_katex_display = False
-            if tag == "span":
-                classes = _class_list(attrs)
+            if tag == "span" and classes:
                 is_katex_display = "katex-display" in classes
-                is_katex = is_katex_display or ("katex" in classes)
-            self.tag_stack.append((tag, is_katex, is_katex_display))
-            if is_katex:
-                self.katex_depth += 1
-            if is_katex_display:
-                self.katex_display_depth += 1
+                if is_katex_display or "katex" in classes:
+                    self._katex_stack.append((len(self.tag_stack), is_katex_display))
+                    self.katex_depth += 1
+                    self._data_mode |= _MODE_KATEX
+                    if is_katex_display:
+                        self.katex_display_depth += 1
+            self.tag_stack.append(tag)
 
         # 未闭合的 katex span 会吞掉后续所有文本；
         # 遇块级标签起始时强制归零（katex 是行内元素，不应跨块）
         if self.katex_depth > 0 and tag in _BLOCK_LEVEL_TAGS:
             self.katex_depth = 0
             self.katex_display_depth = 0
+            self._data_mode &= ~_MODE_KATEX
 
-        if self.skip_stack:
-            if self._should_skip(tag, attrs):
-                self._enter_skip(tag)
-            return
-
-        if self._should_skip(tag, attrs):
+        # 跳过区内外都只判定一次：命中则压栈，已在跳过区内则不再向下处理
+        if self._should_skip(tag, attrs, classes):
             self._enter_skip(tag)
             return
+        if self.skip_stack:
+            return
 
         if tag == "table" and self.in_table:
             self.table_depth += 1
             if self.keep_html:
                 self.table_is_complex = True
             if self.table_capture_html:
-                attr_str = self._attrs_to_str(attrs_list)
-                if attr_str:
-                    self.table_capture_buf.append(f"<table {attr_str}>")
-                else:
-                    self.table_capture_buf.append("<table>")
+                self._capture_starttag(tag, attrs_list)
                 self.table_capture_depth += 1
                 self.table_is_complex = True
             return
@@ -410,38 +548,28 @@ class HTMLToMarkdown(HTMLParser):
         if tag == "table":
             self._ensure_blank_line()
             self.in_table = True
+            self._data_mode |= _MODE_TABLE
             self.table_depth = 1
             self.table_rows = []
             self.table_capture_html = bool(self.keep_html)
             self.table_is_complex = False
             if self.table_capture_html:
-                attr_str = self._attrs_to_str(attrs_list)
-                if attr_str:
-                    self.table_capture_buf = [f"<table {attr_str}>"]
-                else:
-                    self.table_capture_buf = ["<table>"]
+                self.table_capture_buf.clear()
+                self._capture_starttag(tag, attrs_list)
                 self.table_capture_depth = 1
             return
 
         if self.in_table:
             if self.table_depth > 1:
                 if self.table_capture_html:
-                    attr_str = self._attrs_to_str(attrs_list)
-                    if attr_str:
-                        self.table_capture_buf.append(f"<{tag} {attr_str}>")
-                    else:
-                        self.table_capture_buf.append(f"<{tag}>")
+                    self._capture_starttag(tag, attrs_list)
                     if tag == "table":
                         self.table_capture_depth += 1
                         self.table_is_complex = True
                 return
 
             if self.table_capture_html:
-                attr_str = self._attrs_to_str(attrs_list)
-                if attr_str:
-                    self.table_capture_buf.append(f"<{tag} {attr_str}>")
-                else:
-                    self.table_capture_buf.append(f"<{tag}>")
+                self._capture_starttag(tag, attrs_list)
 
             if tag == "tr":
                 self.current_row = []
@@ -449,24 +577,22 @@ class HTMLToMarkdown(HTMLParser):
                 if self.keep_html and self._is_complex_table_attrs(attrs):
                     self.table_is_complex = True
                 self.in_cell = True
-                self.cell_buf = []
+                self.cell_buf.clear()
             elif tag == "br" and self.in_cell:
-                if self.cell_buf and (self.cell_buf[-1].strip().lower() != "<br>"):
-                    self.cell_buf.append("<br>")
+                self._cell_break()
             elif tag in ("p", "div", "li") and self.in_cell:
-                if self.cell_buf and (self.cell_buf[-1].strip().lower() != "<br>"):
-                    self.cell_buf.append("<br>")
+                self._cell_break()
             elif tag == "a" and self.in_cell:
                 self.table_in_a = True
                 thref = attrs.get("href")
                 if thref and _is_unsafe_link_url(thref):
                     thref = None
                 self.table_a_href = thref
-                self.table_a_text = []
+                self.table_a_text.clear()
             elif tag == "img" and self.in_cell:
                 src = _extract_img_src(attrs)
                 if src:
-                    img_url = urljoin(self.base_url, htmllib.unescape(src))
+                    img_url = _join_unescape(self.base_url, src)
                     if not is_probable_icon(img_url):
                         alt = (attrs.get("alt") or "").strip()
                         alt = alt.replace("[", "").replace("]", "")
@@ -480,57 +606,61 @@ class HTMLToMarkdown(HTMLParser):
             if not self.list_stack:
                 self._ensure_blank_line()
         elif tag == "br":
-            self.out.append("\n")
+            self._push("\n")
         elif tag == "hr":
             self._ensure_blank_line()
-            self.out.append("---\n\n")
-        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self._push("---\n\n")
+        elif tag in _HEADING_PREFIXES:
             self._ensure_blank_line()
-            level = int(tag[1])
             self.in_heading = True
             self.heading_out_start = len(self.out)
-            self.heading_text = []
-            self.out.append("#" * level + " ")
+            self.heading_text.clear()
+            self._push(_HEADING_PREFIXES[tag])
         elif tag == "script":
             t = (attrs.get("type") or "").strip().lower()
             if t.startswith("math/tex"):
                 self.in_math_script = True
+                self._data_mode |= _MODE_MATH
                 self.math_script_display = "mode=display" in t
-                self.math_script_buf = []
+                self.math_script_buf.clear()
                 return
             self._enter_skip(tag)
         elif tag == "pre":
             self._ensure_blank_line()
             self.in_pre = True
-            self.pre_buf = []
-            self.pre_lang = self._sanitize_fence_language(self._extract_code_language(attrs))
+            self._data_mode |= _MODE_PRE
+            self.pre_buf.clear()
+            self.pre_lang = self._sanitize_fence_language(self._extract_code_language(attrs, classes))
         elif tag == "code":
             if self.in_pre:
                 if not self.pre_lang:
-                    self.pre_lang = self._sanitize_fence_language(self._extract_code_language(attrs))
+                    self.pre_lang = self._sanitize_fence_language(self._extract_code_language(attrs, classes))
                 return
             self.in_inline_code = True
-            self.inline_code_buf = []
+            self._data_mode |= _MODE_CODE
+            self.inline_code_buf.clear()
         elif tag == "annotation":
             enc = (attrs.get("encoding") or "").strip().lower()
             if enc in ("application/x-tex", "text/tex"):
                 self.in_annotation_tex = True
+                self._data_mode |= _MODE_ANNOT
                 self.annotation_display = self.katex_display_depth > 0
-                self.annotation_buf = []
+                self.annotation_buf.clear()
                 return
         elif tag in ("strong", "b"):
-            self.out.append("**")
+            self._push("**")
         elif tag in ("em", "i"):
-            self.out.append("*")
+            self._push("*")
         elif tag == "a":
             self.in_a = True
+            self._data_mode |= _MODE_LINK
             href = attrs.get("href")
             # 拦截不安全协议（javascript:/vbscript:/file:/data:text/html 等，
             # 含控制字符变体）——避免输出可执行链接
             if href and _is_unsafe_link_url(href):
                 href = None
             self.a_href = href
-            self.a_text = []
+            self.a_text.clear()
             self.a_has_image = False
         elif tag == "img":
             src = _extract_img_src(attrs)
@@ -539,7 +669,7 @@ class HTMLToMarkdown(HTMLParser):
             # 跳过 data: URI，与 ImageURLCollector 行为一致
             if src.strip().lower().startswith("data:"):
                 return
-            img_url = urljoin(self.base_url, htmllib.unescape(src))
+            img_url = _join_unescape(self.base_url, src)
             if is_probable_icon(img_url):
                 return
             alt = (attrs.get("alt") or "").strip()
@@ -550,14 +680,14 @@ class HTMLToMarkdown(HTMLParser):
             if self.in_a:
                 # 图片在 <a> 内：行内输出（不独占一行），标记已产出图片
                 self.a_has_image = True
-                self.out.append(f"![{alt}]({safe_url})")
+                self._push(f"![{alt}]({safe_url})")
             else:
                 self._ensure_blank_line()
-                self.out.append(f"![{alt}]({safe_url})\n")
+                self._push(f"![{alt}]({safe_url})\n")
         elif tag in ("ul", "ol"):
             if self.list_stack:
-                if not self._tail().endswith("\n"):
-                    self.out.append("\n")
+                if not self._tail_str.endswith("\n"):
+                    self._push("\n")
             else:
                 self._ensure_blank_line()
             # <ol start="5"> 支持自定义起始编号
@@ -573,52 +703,58 @@ class HTMLToMarkdown(HTMLParser):
             self.list_stack.append({"type": tag, "n": start_n})
         elif tag == "li":
             if self.list_stack:
-                if self.out and (not self._tail().endswith("\n")):
-                    self.out.append("\n")
-                self.list_stack[-1]["n"] = int(self.list_stack[-1]["n"]) + 1
-                indent = "  " * (len(self.list_stack) - 1)
-                if self.list_stack[-1]["type"] == "ol":
-                    prefix = f"{self.list_stack[-1]['n']}. "
+                if self.out and (not self._tail_str.endswith("\n")):
+                    self._push("\n")
+                top = self.list_stack[-1]
+                top["n"] = int(top["n"]) + 1
+                depth = len(self.list_stack) - 1
+                if top["type"] == "ol":
+                    self._push(f"{'  ' * depth}{top['n']}. ")
+                elif depth < len(_UL_ITEM_PREFIXES):
+                    self._push(_UL_ITEM_PREFIXES[depth])
                 else:
-                    prefix = "- "
-                self.out.append(indent + prefix)
+                    self._push("  " * depth + "- ")
         elif tag == "blockquote":
             self._ensure_blank_line()
-            self.out.append("> ")
+            self._push("> ")
 
     def handle_startendtag(self, tag: str, attrs_list: Sequence[Tuple[str, Optional[str]]]) -> None:
-        tag = tag.lower()
         self.handle_starttag(tag, attrs_list)
         self.handle_endtag(tag)
 
     def handle_endtag(self, tag: str) -> None:
-        tag = tag.lower()
-
         if tag in VOID_TAGS:
             pass
         elif self.tag_stack:
+            stack = self.tag_stack
             matched_idx = -1
-            for idx in range(len(self.tag_stack) - 1, -1, -1):
-                if self.tag_stack[idx][0] == tag:
+            for idx in range(len(stack) - 1, -1, -1):
+                if stack[idx] == tag:
                     matched_idx = idx
                     break
             if matched_idx >= 0:
-                for _ in range(len(self.tag_stack) - matched_idx):
-                    _, is_katex, is_katex_display = self.tag_stack.pop()
-                    if is_katex:
-                        self.katex_depth = max(0, self.katex_depth - 1)
+                # 匹配位置之上未闭合的标签一并弹出
+                del stack[matched_idx:]
+                katex_stack = self._katex_stack
+                while katex_stack and katex_stack[-1][0] >= matched_idx:
+                    _, is_katex_display = katex_stack.pop()
+                    self.katex_depth = max(0, self.katex_depth - 1)
+                    if not self.katex_depth:
+                        self._data_mode &= ~_MODE_KATEX
                     if is_katex_display:
                         self.katex_display_depth = max(0, self.katex_display_depth - 1)
 
         if self.skip_stack:
             if tag == self.skip_stack[-1]:
                 self.skip_stack.pop()
+                if not self.skip_stack:
+                    self._data_mode &= ~_MODE_SKIP
             return
 
         if self.in_table:
             if self.table_capture_html:
                 if tag not in VOID_TAGS:
-                    self.table_capture_buf.append(f"</{tag}>")
+                    self.table_capture_buf.extend(("</", tag, ">"))
                 if tag == "table":
                     self.table_capture_depth -= 1
 
@@ -631,31 +767,22 @@ class HTMLToMarkdown(HTMLParser):
                 text = "".join(self.table_a_text).strip() or (self.table_a_href or "")
                 href = self.table_a_href
                 if href:
-                    href = urljoin(self.base_url, href)
+                    href = _join_href(self.base_url, href)
                     safe_href = _safe_markdown_url(href)
                     self._table_append(f"[{text}]({safe_href})")
                 else:
                     self._table_append(text)
                 self.table_in_a = False
                 self.table_a_href = None
-                self.table_a_text = []
+                self.table_a_text.clear()
             elif tag in ("p", "div", "li") and self.in_cell:
-                if self.cell_buf and (self.cell_buf[-1].strip().lower() != "<br>"):
-                    self.cell_buf.append("<br>")
+                self._cell_break()
             elif tag in ("th", "td") and self.in_cell:
-                cell = "".join(self.cell_buf)
-                cell = cell.replace("\r\n", "\n").replace("\r", "\n")
-                cell = re.sub(r"[ \t\f\v]+", " ", cell)
-                cell = re.sub(r"\s*\n\s*", "<br>", cell)
-                cell = re.sub(r"\s*<br>\s*", "<br>", cell, flags=re.IGNORECASE)
-                cell = re.sub(r"(<br>){2,}", "<br>", cell, flags=re.IGNORECASE)
-                cell = re.sub(r"^(<br>)+", "", cell, flags=re.IGNORECASE)
-                cell = re.sub(r"(<br>)+$", "", cell, flags=re.IGNORECASE)
-                cell = cell.strip()
+                cell = _normalize_cell(self.cell_buf)
                 if self.current_row is not None:
                     self.current_row.append(cell)
                 self.in_cell = False
-                self.cell_buf = []
+                self.cell_buf.clear()
             elif tag == "tr":
                 if self.current_row is not None and any(c.strip() for c in self.current_row):
                     self.table_rows.append(self.current_row)
@@ -665,33 +792,31 @@ class HTMLToMarkdown(HTMLParser):
                     return
                 rows = self.table_rows
                 self.in_table = False
+                self._data_mode &= ~_MODE_TABLE
                 self.table_rows = []
                 self.current_row = None
 
                 if self.table_capture_html and self.table_capture_depth <= 0:
                     if self.keep_html and self.table_is_complex:
-                        self.out.append("".join(self.table_capture_buf))
-                        self.out.append("\n\n")
+                        self.table_capture_buf.append("\n\n")
+                        self._push("".join(self.table_capture_buf))
                         self.table_capture_html = False
-                        self.table_capture_buf = []
+                        self.table_capture_buf.clear()
                         self.table_capture_depth = 0
                         self.table_is_complex = False
                         return
                     self.table_capture_html = False
-                    self.table_capture_buf = []
+                    self.table_capture_buf.clear()
                     self.table_capture_depth = 0
                     self.table_is_complex = False
 
                 if rows:
-                    cols = max(len(r) for r in rows)
-                    norm = [r + [""] * (cols - len(r)) for r in rows]
-                    header = norm[0]
-                    body = norm[1:]
-                    self.out.append("| " + " | ".join(h.replace("|", r"\|") for h in header) + " |\n")
-                    self.out.append("| " + " | ".join(["---"] * cols) + " |\n")
-                    for r in body:
-                        self.out.append("| " + " | ".join(c.replace("|", r"\|") for c in r) + " |\n")
-                    self.out.append("\n")
+                    # 整张表先拼成行列表，最后一次 join 写入输出
+                    cols = max(map(len, rows))
+                    lines = [_md_table_row(rows[0], cols), _md_table_separator(cols)]
+                    lines.extend([_md_table_row(r, cols) for r in rows[1:]])
+                    lines.append("\n")
+                    self._push("\n".join(lines))
             return
 
         if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
@@ -699,23 +824,25 @@ class HTMLToMarkdown(HTMLParser):
                 heading_text = "".join(self.heading_text).strip()
                 if not heading_text:
                     del self.out[self.heading_out_start :]
+                    self._tail_str = "".join(self.out[-8:])[-8:]
                 else:
-                    self.out.append("\n\n")
+                    self._push("\n\n")
             else:
-                self.out.append("\n\n")
+                self._push("\n\n")
             self.in_heading = False
             self.heading_out_start = None
-            self.heading_text = []
+            self.heading_text.clear()
         elif tag == "p":
-            self.out.append("\n\n")
+            self._push("\n\n")
         elif tag == "annotation" and self.in_annotation_tex:
             tex = "".join(self.annotation_buf).strip()
             self.in_annotation_tex = False
-            self.annotation_buf = []
+            self._data_mode &= ~_MODE_ANNOT
+            self.annotation_buf.clear()
             if tex:
                 if self.annotation_display:
                     self._ensure_blank_line()
-                    self.out.append(f"$$\n{tex}\n$$\n\n")
+                    self._push(f"$$\n{tex}\n$$\n\n")
                 else:
                     self._append_text(f"${tex.replace(chr(10), ' ')}$")
             self.annotation_display = False
@@ -723,33 +850,39 @@ class HTMLToMarkdown(HTMLParser):
             tex = "".join(self.math_script_buf).strip()
             display = self.math_script_display
             self.in_math_script = False
+            self._data_mode &= ~_MODE_MATH
             self.math_script_display = False
-            self.math_script_buf = []
+            self.math_script_buf.clear()
             if tex:
                 if display:
                     self._ensure_blank_line()
-                    self.out.append(f"$$\n{tex}\n$$\n\n")
+                    self._push(f"$$\n{tex}\n$$\n\n")
                 else:
                     self._append_text(f"${tex.replace(chr(10), ' ')}$")
         elif tag == "pre":
             code = "".join(self.pre_buf)
-            code = code.replace("\r\n", "\n").replace("\r", "\n").strip("\n")
+            # 多数代码块已是 \n 换行，免去两次整块 replace 拷贝
+            if "\r" in code:
+                code = code.replace("\r\n", "\n").replace("\r", "\n")
+            code = code.strip("\n")
             fence_lang = self._sanitize_fence_language(self.pre_lang)
-            self.out.append(f"```{fence_lang}\n" + code + "\n```\n\n")
+            self._push(f"```{fence_lang}\n" + code + "\n```\n\n")
             self.in_pre = False
-            self.pre_buf = []
+            self._data_mode &= ~_MODE_PRE
+            self.pre_buf.clear()
             self.pre_lang = ""
         elif tag == "code":
             if self.in_pre:
                 return
             code = "".join(self.inline_code_buf).strip()
-            self.out.append("`" + code.replace("`", r"\`") + "`")
+            self._push("`" + code.replace("`", r"\`") + "`")
             self.in_inline_code = False
-            self.inline_code_buf = []
+            self._data_mode &= ~_MODE_CODE
+            self.inline_code_buf.clear()
         elif tag in ("strong", "b"):
-            self.out.append("**")
+            self._push("**")
         elif tag in ("em", "i"):
-            self.out.append("*")
+            self._push("*")
         elif tag == "a":
             href = self.a_href
             text = "".join(self.a_text).strip()
@@ -759,8 +892,9 @@ class HTMLToMarkdown(HTMLParser):
             # 否则会多出一行 [https://host/page](https://host/page)。
             if not text and has_image:
                 self.in_a = False
+                self._data_mode &= ~_MODE_LINK
                 self.a_href = None
-                self.a_text = []
+                self.a_text.clear()
                 self.a_has_image = False
                 return
 
@@ -769,41 +903,57 @@ class HTMLToMarkdown(HTMLParser):
                 text = href or ""
 
             if href:
-                full = urljoin(self.base_url, href)
+                full = _join_href(self.base_url, href)
                 if text.strip() in ("#", "¶", "§") and (href.startswith("#") or full.startswith(self.base_url + "#")):
                     self.in_a = False
+                    self._data_mode &= ~_MODE_LINK
                     self.a_href = None
-                    self.a_text = []
+                    self.a_text.clear()
                     self.a_has_image = False
                     return
 
             if text.lower() == "tag" and href and (href.startswith("#") or href.startswith(self.base_url + "#")):
                 self.in_a = False
+                self._data_mode &= ~_MODE_LINK
                 self.a_href = None
-                self.a_text = []
+                self.a_text.clear()
                 self.a_has_image = False
                 return
 
             if href:
-                href = urljoin(self.base_url, href)
+                href = _join_href(self.base_url, href)
                 safe_href = _safe_markdown_url(href)
-                self.out.append(f"[{text}]({safe_href})")
+                self._push(f"[{text}]({safe_href})")
             else:
-                self.out.append(text)
+                self._push(text)
             self.in_a = False
+            self._data_mode &= ~_MODE_LINK
             self.a_href = None
-            self.a_text = []
+            self.a_text.clear()
             self.a_has_image = False
         elif tag in ("ul", "ol"):
             if self.list_stack:
                 self.list_stack.pop()
-            self.out.append("\n")
+            self._push("\n")
         elif tag == "li":
-            self.out.append("\n")
+            self._push("\n")
         elif tag == "blockquote":
-            self.out.append("\n\n")
+            self._push("\n\n")
 
     def handle_data(self, data: str) -> None:
+        mode = self._data_mode
+        if not mode:
+            # 快路径：不在跳过/公式/表格/代码/链接等状态内的普通正文
+            if not data or data.isspace():
+                return
+            if self.in_heading:
+                self.heading_text.append(data)
+            self._append_text(data)
+            return
+        if mode == _MODE_PRE:
+            # 仅处于 <pre> 内（不在表格/公式/跳过区域）：代码块文本直接入缓冲
+            self.pre_buf.append(data or "")
+            return
         if self.skip_stack:
             return
         if self.in_annotation_tex:
@@ -815,7 +965,7 @@ class HTMLToMarkdown(HTMLParser):
         if self.katex_depth > 0:
             return
         if self.in_table and self.table_capture_html and data:
-            self.table_capture_buf.append(htmllib.escape(data, quote=False))
+            self.table_capture_buf.append(_escape_text(data))
         if self.in_pre:
             self.pre_buf.append(data or "")
             return
@@ -868,16 +1018,17 @@ def _process_outside_code(md: str, fn) -> str:
     return "".join(out_lines)
 
 
+_ATX_HEADING_RE = re.compile(r"^(#{1,6})(\s+)")
+
+
 def _demote_headings_outside_code(md: str, shift: int) -> str:
     """将代码块外的 ATX 标题（# ~ ######）等级提升 *shift* 级（封顶 6）。
 
     用于合并模式：把每页的 #..#### 下移以免与合并文档的顶层标题冲突。
     代码围栏（```/~~~）内的 # 注释行不受影响。
     """
-    pat = re.compile(r"^(#{1,6})(\s+)")
-
     def _bump(line: str) -> str:
-        m = pat.match(line)
+        m = _ATX_HEADING_RE.match(line)
         if not m:
             return line
         new_level = min(6, len(m.group(1)) + shift)
@@ -886,108 +1037,145 @@ def _demote_headings_outside_code(md: str, shift: int) -> str:
     return _process_outside_code(md, _bump)
 
 
-def _strip_empty_headings_outside_code(md: str) -> str:
-    """删除代码块外只含井号、无文本的标题行（如 ``###`` 单独成行）。"""
-    return _process_outside_code(
-        md, lambda line: re.sub(r"^\s*#{1,6}\s*\n?$\n?", "", line)
-    )
+_EMPTY_HEADING_RE = re.compile(r"^\s*#{1,6}\s*\n?$\n?")
 
 
-def _collapse_blank_lines_outside_code(md: str) -> str:
-    """把代码块外连续 3+ 空行折叠为 2 个空行（代码块内原样保留）。"""
-    out_lines: List[str] = []
-    in_fence = False
-    blank_run = 0
-    for line in md.splitlines(True):
-        if _is_fence_line(line):
-            in_fence = not in_fence
-            out_lines.append(line)
-            blank_run = 0
-            continue
-        if in_fence:
-            out_lines.append(line)
+# \( \) \[ \] → $ / $$；替换结果不含反斜杠，单次正则替换与逐个 replace 等价
+_LATEX_DELIM_RE = re.compile(r"\\[\[\]()]")
+_LATEX_DELIM_MAP = {"\\[": "$$", "\\]": "$$", "\\(": "$", "\\)": "$"}
+
+
+def _replace_latex_delims(seg: str) -> str:
+    if "\\" not in seg:
+        return seg
+    return _LATEX_DELIM_RE.sub(lambda m: _LATEX_DELIM_MAP[m.group(0)], seg)
+
+
+def _convert_latex_line(line: str, in_inline_code: bool, inline_tick_len: int) -> Tuple[str, bool, int]:
+    """转换单行中行内代码以外的 LaTeX 定界符；行内代码状态跨行延续。"""
+    # 快速路径：无反引号的行不改变行内代码状态，整行一次处理
+    if "`" not in line:
+        return (line if in_inline_code else _replace_latex_delims(line)), in_inline_code, inline_tick_len
+
+    i = 0
+    n = len(line)
+    converted: List[str] = []
+    while i < n:
+        if line[i] == "`":
+            j = i
+            while j < n and line[j] == "`":
+                j += 1
+            ticks = j - i
+            converted.append(line[i:j])
+            if not in_inline_code:
+                in_inline_code = True
+                inline_tick_len = ticks
+            elif ticks == inline_tick_len:
+                in_inline_code = False
+                inline_tick_len = 0
+            i = j
             continue
-        if line.strip() == "":
-            blank_run += 1
-            if blank_run <= 2:
-                out_lines.append("\n" if line.endswith("\n") else "")
-        else:
-            blank_run = 0
-            out_lines.append(line)
-    return "".join(out_lines)
 
+        j = line.find("`", i)
+        if j == -1:
+            j = n
+        seg = line[i:j]
+        if not in_inline_code:
+            seg = _replace_latex_delims(seg)
+        converted.append(seg)
+        i = j
+
+    return "".join(converted), in_inline_code, inline_tick_len
 
-def _convert_latex_delimiters_outside_code(md: str) -> str:
+
+_HEADING_ANCHOR_RE = re.compile(r"^(#{1,6}\s+.*?)(\s*\[\s*[#¶§]\s*\]\([^)]+\))+\s*$")
+
+
+def _postprocess_markdown(md: str) -> str:
+    """html_to_markdown 的后处理，一次逐行遍历完成以下各步（依次作用于每行）：
+
+    1. 代码围栏（```/~~~）外连续 3+ 空行折叠为 2 个；
+    2. 行内代码与 ``` 围栏外的 LaTeX 定界符转换；
+    3. 删除围栏外只含井号的空标题行；
+    4. 剥离围栏外标题尾部的锚点链接 [#](url) / [¶](url)。
+
+    各步保留各自原有的围栏判定（LaTeX 转换只认 ```），结果与逐步整篇处理一致。
+    """
     out_lines: List[str] = []
     in_fence = False
+    in_latex_fence = False
     in_inline_code = False
     inline_tick_len = 0
+    blank_run = 0
+    # 多数页面不含 \( \) \[ \]：整篇一次 C 层搜索后即可跳过逐行 LaTeX 转换
+    has_latex = _LATEX_DELIM_RE.search(md) is not None
     for line in md.splitlines(True):
-        stripped = line.lstrip()
-        if stripped.startswith("```"):
+        is_fence = _is_fence_line(line)
+        if is_fence:
             in_fence = not in_fence
-            out_lines.append(line)
-            continue
-        if in_fence:
-            out_lines.append(line)
-            continue
+            blank_run = 0
+        elif not in_fence:
+            if line.strip() == "":
+                blank_run += 1
+                if blank_run > 2:
+                    continue
+                line = "\n" if line.endswith("\n") else ""
+            else:
+                blank_run = 0
+
+        if has_latex:
+            if line.lstrip().startswith("```"):
+                in_latex_fence = not in_latex_fence
+            elif not in_latex_fence:
+                line, in_inline_code, inline_tick_len = _convert_latex_line(line, in_inline_code, inline_tick_len)
+
+        if not is_fence and not in_fence:
+            line = _EMPTY_HEADING_RE.sub("", line)
+            if line.startswith("#"):
+                line = _HEADING_ANCHOR_RE.sub(r"\1", line)
+        out_lines.append(line)
+    return "".join(out_lines)
 
-        i = 0
-        converted: List[str] = []
-        while i < len(line):
-            if line[i] == "`":
-                j = i
-                while j < len(line) and line[j] == "`":
-                    j += 1
-                ticks = j - i
-                converted.append(line[i:j])
-                if not in_inline_code:
-                    in_inline_code = True
-                    inline_tick_len = ticks
-                elif ticks == inline_tick_len:
-                    in_inline_code = False
-                    inline_tick_len = 0
-                i = j
-                continue
 
-            j = line.find("`", i)
-            if j == -1:
-                j = len(line)
-            seg = line[i:j]
-            if not in_inline_code:
-                seg = seg.replace(r"\[", "$$").replace(r"\]", "$$")
-                seg = seg.replace(r"\(", "$").replace(r"\)", "$")
-            converted.append(seg)
-            i = j
+_FEED_CHUNK_SIZE = 64 * 1024
 
-        out_lines.append("".join(converted))
-    return "".join(out_lines)
+
+def _iter_feed_chunks(html: str, size: int) -> Iterator[str]:
+    """把 HTML 切成约 size 大小的块，切点总在 '<' 之前。
+
+    HTMLParser 会在块尾把未结束的文本先行 flush，若在文本中间切块，
+    同一段文字会分两次进入 handle_data，_append_text 会在其间插入空格；
+    对齐到 '<' 可保证文本段不被切开，输出与整串 feed 一致。
+    """
+    n = len(html)
+    i = 0
+    while i < n:
+        j = html.find("<", i + size)
+        if j == -1:
+            j = n
+        yield html[i:j]
+        i = j
 
 
 def html_to_markdown(article_html: str, base_url: str, url_to_local: Dict[str, str], keep_html: bool = False) -> str:
     parser = HTMLToMarkdown(base_url=base_url, url_to_local=url_to_local, keep_html=keep_html)
-    parser.feed(article_html)
+    # 分块喂给解析器：已解析部分随即从 rawdata 中丢弃，降低大页面的峰值内存
+    for chunk in _iter_feed_chunks(article_html, _FEED_CHUNK_SIZE):
+        parser.feed(chunk)
     md = "".join(parser.out)
     md = md.replace("\r\n", "\n")
-    # 以下后处理均在代码围栏（```/~~~）外执行，避免破坏代码块内容
-    md = _collapse_blank_lines_outside_code(md)
-    md = _convert_latex_delimiters_outside_code(md)
-    md = _strip_empty_headings_outside_code(md)
-    # 标题尾部的锚点链接 [#](url) / [¶](url) 剥离（仅在代码块外）
-    md = _process_outside_code(
-        md,
-        lambda line: re.sub(
-            r"^(#{1,6}\s+.*?)(\s*\[\s*[#¶§]\s*\]\([^)]+\))+\s*$",
-            r"\1",
-            line,
-        ),
-    )
+    md = _postprocess_markdown(md)
     return md.strip() + "\n"
 
 
+_WS_RUN_RE = re.compile(r"\s+")
+_TITLE_PUNCT_RE = re.compile(r"[^\w\u4e00-\u9fff ]+")
+_HASHES_ONLY_RE = re.compile(r"#{1,6}")
+
+
 def _normalize_title(text: str) -> str:
-    t = re.sub(r"\s+", " ", (text or "").strip()).lower()
-    t = re.sub(r"[^\w\u4e00-\u9fff ]+", "", t)
+    t = _WS_RUN_RE.sub(" ", (text or "").strip()).lower()
+    t = _TITLE_PUNCT_RE.sub("", t)
     return t
 
 
@@ -1004,7 +1192,7 @@ def strip_duplicate_h1(md_body: str, title: str, max_scan_lines: int = 80) -> st
         line = lines[i].strip()
         if not line:
             continue
-        if re.fullmatch(r"#{1,6}", line):
+        if _HASHES_ONLY_RE.fullmatch(line):
             del lines[i : i + 1]
             break
         if line.startswith("# "):
@@ -1017,78 +1205,80 @@ def strip_duplicate_h1(md_body: str, title: str, max_scan_lines: int = 80) -> st
     return "\n".join(lines).lstrip("\n").rstrip() + "\n"
 
 
-def clean_wechat_noise(md_content: str) -> str:
-    # 微信底部交互按钮（取消/允许/Cancel/Allow/Video/Share 等）的特征是
-    # 转成 Markdown 后**独占一行**（原本是独立 <a> 或按钮）。
-    # 因此所有清理规则都带行锚点 ^...$，避免误删正文句子中的同名词。
-    result = md_content
+# 微信底部交互按钮（取消/允许/Cancel/Allow/Video/Share 等）的特征是
+# 转成 Markdown 后**独占一行**（原本是独立 <a> 或按钮）。
+# 因此所有清理规则都带行锚点 ^...$，避免误删正文句子中的同名词。
+_WECHAT_NOISE_RES = (
     # 行内交互按钮串：删除独占整行、仅由逗号/空格/这些词构成的行
-    result = re.sub(
+    re.compile(
         r"(?m)^[ \t,，]*(?:Video|Mini Program|Like|Wow|Share|Comment|Favorite|听过)"
         r"(?:[ \t,，]*(?:Video|Mini Program|Like|Wow|Share|Comment|Favorite|听过))*[ \t,，]*$",
-        "",
-        result,
-        flags=re.IGNORECASE,
-    )
+        re.IGNORECASE,
+    ),
     # "取消赞"/"取消在看" 等长按提示——独占整行
-    result = re.sub(r"(?m)^[ \t,，]*轻点两下取消(?:赞|在看)[ \t,，]*$", "", result)
-    result = re.sub(
+    re.compile(r"(?m)^[ \t,，]*轻点两下取消(?:赞|在看)[ \t,，]*$"),
+    re.compile(
         r"(?m)^[ \t,，]*(?:Scan to Follow|Scan with Weixin to\s*use this Mini Program"
         r"|微信扫一扫可打开此内容.*?使用完整服务)[ \t,，]*$",
-        "",
-        result,
-        flags=re.IGNORECASE,
-    )
+        re.IGNORECASE,
+    ),
     # Cancel/Allow/取消/允许 按钮文本——仅在独占整行时删除（纯文本或链接形式）
-    result = re.sub(
+    re.compile(
         r"(?m)^[ \t,，]*(?:\[?(?:Cancel|Allow|取消|允许)\]?\]\([^)]*\)|Cancel|Allow|取消|允许)[ \t,，]*$",
-        "",
-        result,
-        flags=re.IGNORECASE,
-    )
+        re.IGNORECASE,
+    ),
     # "阅读原文"/"Read more" 按钮链接——独占整行的纯文本或链接形式均清理
-    result = re.sub(
+    re.compile(
         r"(?m)^[ \t,，]*(?:\[(?:阅读原文|Read more|Read original)\]\([^)]*\)"
         r"|(?:阅读原文|Read more|Read original))[ \t,，]*$",
-        "",
-        result,
-        flags=re.IGNORECASE,
-    )
-    result = re.sub(r"\n{3,}", "\n\n", result)
-    result = re.sub(r"\n[ \t]+\n", "\n\n", result)
+        re.IGNORECASE,
+    ),
+)
+
+_WIKI_NOISE_RES = (
+    re.compile(r"\[\[(?:Edit|编辑|修改|更新)\]\([^)]*\)\]", re.IGNORECASE),
+    re.compile(
+        r"\[(?:Edit|编辑|修改|更新|History|历史|Diff|差分|Raw|源代码|附件|Attach|新建)\]\([^)]*\)",
+        re.IGNORECASE,
+    ),
+    re.compile(r"\[\^\]\([^)]*\)"),
+    re.compile(r"\[(?:↑|↓|↖|↗|↙|↘|Top|顶部|返回顶部)\]\([^)]*\)", re.IGNORECASE),
+    re.compile(r"\[\?\]\([^)]*(?:cmd=edit|action=edit)[^)]*\)", re.IGNORECASE),
+    re.compile(r"\[\s*\[[^\]]+\]\([^)]+\)\s*\]\s*"),
+)
+
+_EXTRA_NEWLINES_RE = re.compile(r"\n{3,}")
+_BLANK_WS_LINE_RE = re.compile(r"\n[ \t]+\n")
+
+
+def clean_wechat_noise(md_content: str) -> str:
+    result = md_content
+    for pattern in _WECHAT_NOISE_RES:
+        result = pattern.sub("", result)
+    result = _EXTRA_NEWLINES_RE.sub("\n\n", result)
+    result = _BLANK_WS_LINE_RE.sub("\n\n", result)
     return result.strip()
 
 
 def clean_wiki_noise(md_content: str) -> str:
     result = md_content
-    result = re.sub(r"\[\[(?:Edit|编辑|修改|更新)\]\([^)]*\)\]", "", result, flags=re.IGNORECASE)
-    result = re.sub(
-        r"\[(?:Edit|编辑|修改|更新|History|历史|Diff|差分|Raw|源代码|附件|Attach|新建)\]\([^)]*\)",
-        "",
-        result,
-        flags=re.IGNORECASE,
-    )
-    result = re.sub(r"\[\^\]\([^)]*\)", "", result)
-    result = re.sub(
-        r"\[(?:↑|↓|↖|↗|↙|↘|Top|顶部|返回顶部)\]\([^)]*\)",
-        "",
-        result,
-        flags=re.IGNORECASE,
-    )
-    result = re.sub(r"\[\?\]\([^)]*(?:cmd=edit|action=edit)[^)]*\)", "", result, flags=re.IGNORECASE)
-    result = re.sub(r"\[\s*\[[^\]]+\]\([^)]+\)\s*\]\s*", "", result)
-    result = re.sub(r"\n{3,}", "\n\n", result)
-    result = re.sub(r"\n[ \t]+\n", "\n\n", result)
+    for pattern in _WIKI_NOISE_RES:
+        result = pattern.sub("", result)
+    result = _EXTRA_NEWLINES_RE.sub("\n\n", result)
+    result = _BLANK_WS_LINE_RE.sub("\n\n", result)
     return result.strip()
 
 
+_MD_LINK_RE = re.compile(r"(?<!!)\[([^\]]+)\]\(([^)]+)\)")
+_FENCE_OPEN_RE = re.compile(r"^([`~]{3,})")
+
+
 def rewrite_internal_links(md_content: str, url_to_anchor: Dict[str, str]) -> Tuple[str, int]:
     if not url_to_anchor:
         return md_content, 0
 
     rewrite_count = 0
     result = md_content
-    link_pattern = re.compile(r"(?<!!)\[([^\]]+)\]\(([^)]+)\)")
 
     def replace_link(match: re.Match) -> str:
         nonlocal rewrite_count
@@ -1125,7 +1315,6 @@ def rewrite_internal_links(md_content: str, url_to_anchor: Dict[str, str]) -> Tu
         return match.group(0)
 
     # 按代码围栏分段，仅处理围栏外的部分（避免破坏代码示例中的链接）
-    fence_re = re.compile(r"^([`~]{3,})")
     lines = result.split("\n")
     parts: List[str] = []
     in_fence = False
@@ -1134,11 +1323,11 @@ def rewrite_internal_links(md_content: str, url_to_anchor: Dict[str, str]) -> Tu
 
     def flush_outside() -> None:
         if outside_buf:
-            parts.append(link_pattern.sub(replace_link, "\n".join(outside_buf)))
+            parts.append(_MD_LINK_RE.sub(replace_link, "\n".join(outside_buf)))
             outside_buf.clear()
 
     for line in lines:
-        m = fence_re.match(line.strip())
+        m = _FENCE_OPEN_RE.match(line.strip())
         if m and (not in_fence or line.strip().startswith(fence_char * 3)):
             # 围栏开/闭行
             flush_outside()
@@ -83,6 +83,15 @@ def _api_headers() -> Dict[str, str]:
 # API 调用
 # ═══════════════════════════════════════════════════════════════════════════
 
+def _preview_body(r: requests.Response, limit: int = 200) -> str:
+    """错误信息用的响应体预览：只解码前 *limit* 字节，避免 r.text 对全文做编码猜测。"""
+    head = r.content[:limit]
+    try:
+        return head.decode(r.encoding or "utf-8", errors="replace")
+    except LookupError:
+        return head.decode("utf-8", errors="replace")
+
+
 def _load_page_chunk(
     session: requests.Session,
     page_id: str,
@@ -106,7 +115,7 @@ def _load_page_chunk(
     try:
         return r.json()
     except ValueError as e:
-        raise RuntimeError(f"Notion API loadPageChunk 返回非 JSON 响应: {r.text[:200]}") from e
+        raise RuntimeError(f"Notion API loadPageChunk 返回非 JSON 响应: {_preview_body(r)}") from e
 
 
 def _sync_record_values(
@@ -130,7 +139,7 @@ def _sync_record_values(
     try:
         return r.json()
     except ValueError as e:
-        raise RuntimeError(f"Notion API syncRecordValues 返回非 JSON 响应: {r.text[:200]}") from e
+        raise RuntimeError(f"Notion API syncRecordValues 返回非 JSON 响应: {_preview_body(r)}") from e
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import hashlib
 import html as htmllib
 import os
@@ -15,15 +16,14 @@ from .models import BatchPageResult
 from .security import redact_url, redact_urls_in_markdown
 
 
+# 一次 translate 完成反斜杠/双引号转义与换行、制表符折叠
+_YAML_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": " ", "\r": " ", "\t": " "})
+
+
 def yaml_escape_str(s: str) -> str:
     if not s:
         return ""
-    s = s.replace("\\", "\\\\")
-    s = s.replace('"', '\\"')
-    s = s.replace("\n", " ")
-    s = s.replace("\r", " ")
-    s = s.replace("\t", " ")
-    return s.strip()
+    return s.translate(_YAML_ESCAPE_TABLE).strip()
 
 
 def escape_markdown_link_text(text: str) -> str:
@@ -32,23 +32,22 @@ def escape_markdown_link_text(text: str) -> str:
     return text.replace("[", "\\[").replace("]", "\\]")
 
 
+_FRONTMATTER_TEMPLATE = '---\ntitle: "{title}"\nsource: "{source}"\ndate: "{date}"\n{tags}---\n\n'
+
+
 def generate_frontmatter(title: str, url: str, tags: Optional[List[str]] = None) -> str:
-    date_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    safe_title = yaml_escape_str(title)
-    safe_url = yaml_escape_str(url or "")
-    lines = [
-        "---",
-        f'title: "{safe_title}"',
-        f'source: "{safe_url}"',
-        f'date: "{date_str}"',
-    ]
+    tags_line = ""
     if tags:
         tags_str = ", ".join(f'"{yaml_escape_str(t)}"' for t in tags)
-        lines.append(f"tags: [{tags_str}]")
-    lines.append("---")
-    lines.append("")
-    lines.append("")
-    return "\n".join(lines)
+        tags_line = f"tags: [{tags_str}]\n"
+    return _FRONTMATTER_TEMPLATE.format_map(
+        {
+            "title": yaml_escape_str(title),
+            "source": yaml_escape_str(url or ""),
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "tags": tags_line,
+        }
+    )
 
 
 # Windows 保留文件名（不区分大小写，不含扩展名时仍保留）
@@ -59,10 +58,15 @@ _WIN_RESERVED_NAMES = frozenset(
 )
 
 
+_FILENAME_UNSAFE_RE = re.compile(r"[^\w.\-]+", re.UNICODE)
+_MULTI_DASH_RE = re.compile(r"-{2,}")
+
+
+@functools.lru_cache(maxsize=4096)
 def _sanitize_filename_part(text: str) -> str:
     text = text.strip()
-    text = re.sub(r"[^\w.\-]+", "-", text, flags=re.UNICODE)
-    text = re.sub(r"-{2,}", "-", text)
+    text = _FILENAME_UNSAFE_RE.sub("-", text)
+    text = _MULTI_DASH_RE.sub("-", text)
     text = text.strip("-") or "untitled"
     # Windows 保留名（CON/NUL/PRN/AUX/COM1-9/LPT1-9）加下划线后缀避免冲突
     stem = text
@@ -97,6 +101,7 @@ def _safe_path_length(base_dir: str, filename: str, max_total: int = 250) -> str
     return new_filename
 
 
+@functools.lru_cache(maxsize=4096)
 def _default_basename(url: str, max_len: int = 80) -> str:
     parsed = urlparse(url)
     host = parsed.netloc.lower()
@@ -115,11 +120,16 @@ def _default_basename(url: str, max_len: int = 80) -> str:
     return (base[: max_len - 9] + "-" + suffix).rstrip("-")
 
 
+_ANCHOR_UNSAFE_RE = re.compile(r"[^\w\s\u4e00-\u9fff-]")
+_ANCHOR_WS_RE = re.compile(r"\s+")
+_ANCHOR_DASH_RE = re.compile(r"-+")
+
+
 def _make_anchor_id(text: str) -> str:
     anchor = text.lower()
-    anchor = re.sub(r"[^\w\s\u4e00-\u9fff-]", "", anchor)
-    anchor = re.sub(r"\s+", "-", anchor)
-    anchor = re.sub(r"-+", "-", anchor)
+    anchor = _ANCHOR_UNSAFE_RE.sub("", anchor)
+    anchor = _ANCHOR_WS_RE.sub("-", anchor)
+    anchor = _ANCHOR_DASH_RE.sub("-", anchor)
     return anchor.strip("-") or "section"
 
 
@@ -413,6 +423,11 @@ def generate_index_markdown(
     return "\n".join(parts)
 
 
+# 共享 assets 目录时，把页面内 "xxx.assets/" 相对引用改写为指向共享目录
+_MD_ASSETS_REF_RE = re.compile(r"(\!\[[^\]]*\]\()([^/)]+\.assets/)([^)]+\))")
+_HTML_ASSETS_REF_RE = re.compile(r'(<img[^>]+src=["\'])([^"\'/]+\.assets/)([^"\']+)')
+
+
 def batch_save_individual(
     results: List[BatchPageResult],
     output_dir: str,
@@ -452,13 +467,11 @@ def batch_save_individual(
             except ValueError:
                 # Windows 跨盘符时 relpath 抛 ValueError；回退为绝对路径
                 rel_assets_path = shared_assets_dir.replace("\\", "/")
-            content = re.sub(
-                r"(\!\[[^\]]*\]\()([^/)]+\.assets/)([^)]+\))",
+            content = _MD_ASSETS_REF_RE.sub(
                 lambda m: m.group(1) + rel_assets_path + "/" + m.group(3),
                 content,
             )
-            content = re.sub(
-                r'(<img[^>]+src=["\'])([^"\'/]+\.assets/)([^"\']+)',
+            content = _HTML_ASSETS_REF_RE.sub(
                 lambda m: m.group(1) + rel_assets_path + "/" + m.group(3),
                 content,
             )
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import html as htmllib
+import mmap
 import os
 import re
 import sys
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Set, Union
 from urllib.parse import unquote, urlparse
 
 from .models import JSChallengeResult, ValidationResult
@@ -93,14 +94,32 @@ def redact_urls_in_markdown(md_text: str) -> str:
     return out
 
 
+_TITLE_TAG_RE = re.compile(r"<title\b[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_WS_RUN_RE = re.compile(r"\s+")
+
+
 def _extract_title(html: str) -> Optional[str]:
-    m = re.search(r"<title\b[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    m = _TITLE_TAG_RE.search(html)
     if not m:
         return None
-    title = re.sub(r"\s+", " ", htmllib.unescape(m.group(1))).strip()
+    title = _WS_RUN_RE.sub(" ", htmllib.unescape(m.group(1))).strip()
     return title or None
 
 
+# 正文粗提取：script/style/注释一次扫描删除（按文档顺序匹配，注释内的
+# <script> 不会被误当作脚本起点）；标签与空白串合并为单个空格
+_INVISIBLE_BLOCK_RE = re.compile(
+    r"<script[^>]*>.*?</script>|<style[^>]*>.*?</style>|<!--.*?-->", re.IGNORECASE | re.DOTALL
+)
+_TAG_OR_SPACE_RUN_RE = re.compile(r"(?:<[^>]+>|\s)+")
+_JS_REQUIRED_PATTERNS = (
+    (re.compile(r"javascript\s+is\s+(disabled|required)"), "页面提示 JavaScript 必需/被禁用"),
+    (re.compile(r"please\s+(enable|turn\s+on)\s+javascript"), "页面提示请启用 JavaScript"),
+    (re.compile(r"browser.*does\s+not\s+support.*javascript"), "页面提示浏览器不支持 JavaScript"),
+)
+_NOSCRIPT_BLOCK_RE = re.compile(r"<noscript[^>]*>(.*?)</noscript>", re.IGNORECASE | re.DOTALL)
+
+
 def detect_js_challenge(html: str, title: Optional[str] = None) -> JSChallengeResult:
     """
     检测页面是否为 JS 反爬挑战页面（如 Cloudflare、Akamai 等）。
@@ -136,14 +155,9 @@ def detect_js_challenge(html: str, title: Optional[str] = None) -> JSChallengeRe
             signals.append(desc)
             break
 
-    js_required_patterns = [
-        (r"javascript\s+is\s+(disabled|required)", "页面提示 JavaScript 必需/被禁用"),
-        (r"please\s+(enable|turn\s+on)\s+javascript", "页面提示请启用 JavaScript"),
-        (r"browser.*does\s+not\s+support.*javascript", "页面提示浏览器不支持 JavaScript"),
-    ]
     html_lower = html.lower()
-    for pattern, desc in js_required_patterns:
-        if re.search(pattern, html_lower):
+    for pattern, desc in _JS_REQUIRED_PATTERNS:
+        if pattern.search(html_lower):
             signals.append(desc)
             break
 
@@ -155,11 +169,8 @@ def detect_js_challenge(html: str, title: Optional[str] = None) -> JSChallengeRe
     # ------------------------------------------------------------------
     # 中置信度信号：内容极短 + 包含特定关键词
     # ------------------------------------------------------------------
-    body_text = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.IGNORECASE | re.DOTALL)
-    body_text = re.sub(r"<style[^>]*>.*?</style>", "", body_text, flags=re.IGNORECASE | re.DOTALL)
-    body_text = re.sub(r"<!--.*?-->", "", body_text, flags=re.DOTALL)
-    body_text = re.sub(r"<[^>]+>", " ", body_text)
-    body_text = re.sub(r"\s+", " ", body_text).strip()
+    body_text = _INVISIBLE_BLOCK_RE.sub("", html)
+    body_text = _TAG_OR_SPACE_RUN_RE.sub(" ", body_text).strip()
 
     if len(body_text) < 200:
         short_content_keywords = ["browser", "javascript", "enable", "loading", "redirect", "verify"]
@@ -167,7 +178,7 @@ def detect_js_challenge(html: str, title: Optional[str] = None) -> JSChallengeRe
         if found_keywords:
             signals.append(f"页面正文极短（{len(body_text)} 字符）且包含关键词: {', '.join(found_keywords)}")
 
-    noscript_match = re.search(r"<noscript[^>]*>(.*?)</noscript>", html, re.IGNORECASE | re.DOTALL)
+    noscript_match = _NOSCRIPT_BLOCK_RE.search(html)
     if noscript_match:
         noscript_content = noscript_match.group(1).lower()
         if "javascript" in noscript_content or "enable" in noscript_content:
@@ -222,49 +233,91 @@ def print_js_challenge_warning(result: JSChallengeResult, url: str) -> None:
     print(file=sys.stderr)
 
 
-def validate_markdown(md_path: str, assets_dir: str) -> ValidationResult:
-    with open(md_path, "r", encoding="utf-8") as f:
-        text = f.read()
+# 图片引用模式为纯 ASCII，直接在 bytes 上匹配（UTF-8 多字节序列不会含 ] 或 )），免去整文件解码
+_MD_IMG_REF_RE = re.compile(rb"!\[[^\]]*\]\(([^)]+)\)")
+_MD_REF_TITLE_RE = re.compile(r'\s+["\']([^"\']*)["\']\s*$')
+# 非本地引用：带 scheme:// 的远程 URL，以及内联的 data: URI（转换器保留 <img src="data:image/...">）
+_NON_LOCAL_REF_RE = re.compile(r"^(?:[a-z]+://|data:)", re.IGNORECASE)
+
+
+def _is_abs_ref(r: str) -> bool:
+    """本机绝对路径或 Windows 盘符绝对路径（C:\\ / C:/），纯字符判断免去正则调用。"""
+    if os.path.isabs(r):
+        return True
+    return len(r) >= 3 and r[1] == ":" and r[2] in "\\/" and r[0].isascii() and r[0].isalpha()
 
-    refs = re.findall(r"!\[[^\]]*\]\(([^)]+)\)", text)
-    # 剥离可选 title（path "title"）和尖括号包裹（<path>）
-    cleaned_refs: List[str] = []
-    for r in refs:
+
+def _read_image_refs(md_path: str) -> List[bytes]:
+    """以 mmap 只读映射 Markdown 文件并提取图片引用的原始字节，不把整个文件解码为 str。"""
+    with open(md_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []  # 空文件无法 mmap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _MD_IMG_REF_RE.findall(mm)
+
+
+def validate_markdown(md_path: str, assets_dir: str) -> ValidationResult:
+    # 剥离可选 title（path "title"）和尖括号包裹（<path>），同一遍内区分本地引用
+    refs: List[str] = []
+    local_refs: List[str] = []
+    for raw in _read_image_refs(md_path):
+        r = raw.decode("utf-8")
+        if "\r" in r:
+            # 与文本模式读取一致：统一换行符
+            r = r.replace("\r\n", "\n").replace("\r", "\n")
         r = r.strip()
         if r.startswith("<") and r.endswith(">"):
             r = r[1:-1].strip()
         # 去除末尾 title: 'path "title"' -> 'path'
-        r = re.sub(r'\s+["\']([^"\']*)["\']\s*$', '', r).strip()
-        cleaned_refs.append(r)
-    refs = cleaned_refs
-    local_refs = [r for r in refs if not re.match(r"^[a-z]+://", r, re.IGNORECASE)]
+        r = _MD_REF_TITLE_RE.sub("", r).strip()
+        refs.append(r)
+        if not _NON_LOCAL_REF_RE.match(r):
+            local_refs.append(r)
+
+    # 资产目录只扫描一次：文件计数与「引用是否存在」共用同一份目录项，
+    # 指向资产目录的引用命中即可免去逐个 stat；未命中再回退 os.path.exists
+    # （大小写不敏感的文件系统上仍以 exists 为准）
+    asset_files = 0
+    present: Set[str] = set()
+    cwd = os.getcwd()
+    assets_norm = os.path.normpath(os.path.join(cwd, assets_dir))
+    if os.path.isdir(assets_dir):
+        with os.scandir(assets_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    asset_files += 1
+                    present.add(entry.name)
+                elif entry.is_dir():
+                    present.add(entry.name)
+
+    def _exists(p: str) -> bool:
+        head, name = os.path.split(os.path.normpath(os.path.join(cwd, p)))
+        if name in present and head == assets_norm:
+            return True
+        return os.path.exists(p)
 
     missing: List[str] = []
     md_parent = os.path.dirname(md_path)
     for r in local_refs:
         # 先按字面路径检查（处理文件名本身包含 %20 等字面序列的情况）
-        if os.path.isabs(r) or re.match(r"^[A-Za-z]:[\\/]", r):
+        if _is_abs_ref(r):
             p_raw = os.path.normpath(r)
         else:
             p_raw = os.path.normpath(os.path.join(md_parent, r))
-        if os.path.exists(p_raw):
+        if _exists(p_raw):
             continue
         # 字面路径不存在时，回退到 URL 解码后再查
         # （_safe_markdown_url 会把空格→%20、括号→%28/%29，实际文件名无编码）
         decoded = unquote(r)
         if decoded != r:
-            if os.path.isabs(decoded) or re.match(r"^[A-Za-z]:[\\/]", decoded):
+            if _is_abs_ref(decoded):
                 p_decoded = os.path.normpath(decoded)
             else:
                 p_decoded = os.path.normpath(os.path.join(md_parent, decoded))
-            if os.path.exists(p_decoded):
+            if _exists(p_decoded):
                 continue
         missing.append(r)
 
-    asset_files = 0
-    if os.path.isdir(assets_dir):
-        asset_files = len([f for f in os.listdir(assets_dir) if os.path.isfile(os.path.join(assets_dir, f))])
-
     return ValidationResult(
         image_refs=len(refs),
         local_image_refs=len(local_refs),
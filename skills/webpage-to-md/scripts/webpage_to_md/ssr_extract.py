@@ -553,6 +553,9 @@ def _scan_scripts_for_richtext(page_html: str) -> Optional[str]:
     return None
 
 
+_ASSIGN_OBJECT_RE = re.compile(r'=\s*(\{)')
+
+
 def _try_parse_richtext_from_script(script_body: str) -> Optional[str]:
     """尝试从单个 script 内容中解析富文本 JSON 数据。"""
     # 策略 1：直接尝试解析为 JSON
@@ -560,7 +563,7 @@ def _try_parse_richtext_from_script(script_body: str) -> Optional[str]:
 
     # 策略 2：寻找赋值语句中的 JSON (如 window.xxx = {...})
     if json_data is None:
-        for m in re.finditer(r'=\s*(\{)', script_body):
+        for m in _ASSIGN_OBJECT_RE.finditer(script_body):
             json_str = _extract_json_object_str(script_body, m.start(1))
             if json_str:
                 json_data = _try_parse_json(json_str)
@@ -761,6 +764,9 @@ def _try_parse_json(s: str) -> Any:
 # 检测 + 统一入口
 # ═══════════════════════════════════════════════════════════════════════════
 
+_TITLE_TEXT_RE = re.compile(r'<title[^>]*>([^<]+)</title>', re.IGNORECASE)
+
+
 def try_ssr_extract(page_html: str, url: str = "") -> Optional[SSRContent]:
     """尝试从 *page_html* 中提取 SSR 嵌入的文章正文。
 
@@ -785,7 +791,7 @@ def try_ssr_extract(page_html: str, url: str = "") -> Optional[SSRContent]:
     fallback_html = _scan_scripts_for_richtext(page_html)
     if fallback_html:
         # 尝试从 <title> 提取标题
-        title_m = re.search(r'<title[^>]*>([^<]+)</title>', page_html, re.IGNORECASE)
+        title_m = _TITLE_TEXT_RE.search(page_html)
         title = title_m.group(1).strip() if title_m else ""
         full_html = (
             f'<!DOCTYPE html><html><head><meta charset="utf-8">'
@@ -966,15 +972,20 @@ def _extract_json_object_str(html: str, start: int) -> Optional[str]:
     return None
 
 
+_RENDER_MD_TAIL_RE = re.compile(r'\n\s*`?\}?\s*>\s*</RenderMd>.*$', re.DOTALL)
+_ADMONITION_OPEN_RE = re.compile(r'^:::(\w+)\s*$', re.MULTILINE)
+_ADMONITION_CLOSE_RE = re.compile(r'^:::\s*$', re.MULTILINE)
+_EMPTY_ID_SPAN_RE = re.compile(r'<span\s+id="[^"]*"\s*>\s*</span>')
+_MD_IMG_SIZE_SUFFIX_RE = re.compile(r'(!\[[^\]]*\]\([^)]+?)\s+=\d+x\d*\s*(\))')
+
+
 def _clean_md_content(md_text: str) -> str:
     """清理 MDContent 中的框架残留和特殊语法。"""
-    md_text = re.sub(
-        r'\n\s*`?\}?\s*>\s*</RenderMd>.*$', '', md_text, flags=re.DOTALL
-    )
-    md_text = re.sub(r'^:::(\w+)\s*$', r'> **\1**:', md_text, flags=re.MULTILINE)
-    md_text = re.sub(r'^:::\s*$', '', md_text, flags=re.MULTILINE)
-    md_text = re.sub(r'<span\s+id="[^"]*"\s*>\s*</span>', '', md_text)
-    md_text = re.sub(r'(!\[[^\]]*\]\([^)]+?)\s+=\d+x\d*\s*(\))', r'\1\2', md_text)
+    md_text = _RENDER_MD_TAIL_RE.sub('', md_text)
+    md_text = _ADMONITION_OPEN_RE.sub(r'> **\1**:', md_text)
+    md_text = _ADMONITION_CLOSE_RE.sub('', md_text)
+    md_text = _EMPTY_ID_SPAN_RE.sub('', md_text)
+    md_text = _MD_IMG_SIZE_SUFFIX_RE.sub(r'\1\2', md_text)
     return md_text.strip()
 
 
@@ -59,6 +59,25 @@ class TestMarkdownConversion(unittest.TestCase):
         md = grab.html_to_markdown(html, base_url="https://example.com", url_to_local={}, keep_html=False)
         self.assertIn("Hello **world**.", md)
 
+    def test_table_cell_pipe_escaped(self):
+        html = "<table><tr><th>a|b</th><th>c</th></tr><tr><td>1</td></tr></table>"
+        md = grab.html_to_markdown(html, base_url="https://example.com", url_to_local={})
+        self.assertIn("| a\\|b | c |\n| --- | --- |\n| 1 |  |\n", md)
+
+    def test_chunked_feed_keeps_words_intact(self):
+        """分块喂入解析器时切点对齐 '<'，长文本不会被切开插入空格。"""
+        from webpage_to_md import markdown_conv
+
+        html = "<article><p>" + "abcdefghij" * 20 + "</p><p>AT&amp;T <b>x</b></p></article>"
+        whole = grab.html_to_markdown(html, base_url="https://example.com", url_to_local={})
+        with mock.patch.object(markdown_conv, "_FEED_CHUNK_SIZE", 7):
+            chunks = list(markdown_conv._iter_feed_chunks(html, 7))
+            chunked = grab.html_to_markdown(html, base_url="https://example.com", url_to_local={})
+        self.assertEqual("".join(chunks), html)
+        self.assertTrue(all(c.startswith("<") for c in chunks))
+        self.assertEqual(chunked, whole)
+        self.assertIn("abcdefghij" * 20, whole)
+
 
 class _FakeResponse:
     def __init__(self, chunks, headers=None, encoding="utf-8", status_ok=True):
@@ -83,7 +102,8 @@ class _FakeSession:
     def __init__(self, resp: _FakeResponse):
         self._resp = resp
 
-    def get(self, url, timeout, stream, headers):
+    def get(self, url, timeout, stream, headers=None):
+        self.headers = headers
         return self._resp
 
 
@@ -94,6 +114,16 @@ class TestFetchHtml(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             grab.fetch_html(session=session, url="https://example.com", timeout_s=1, retries=1, max_html_bytes=10)
 
+    def test_fetch_html_allows_compression_and_keep_alive(self):
+        """HTML 请求不再强制 identity 编码与 Connection: close。"""
+        resp = _FakeResponse([b"<p>ok</p>"])
+        session = _FakeSession(resp)
+        html = grab.fetch_html(session=session, url="https://example.com", timeout_s=1, retries=1)
+        self.assertEqual(html, "<p>ok</p>")
+        sent = session.headers or {}
+        self.assertNotIn("Connection", sent)
+        self.assertNotIn("Accept-Encoding", sent)
+
 
 class TestLinkRewrite(unittest.TestCase):
     def test_rewrite_internal_links_fragment(self):
@@ -400,6 +430,19 @@ class TestValidateUrlDecoding(unittest.TestCase):
             self.assertEqual(result.missing_files, [],
                              f"Literal %20 in filename should be found by raw path check, got: {result.missing_files}")
 
+    def test_validate_skips_data_uri_refs(self):
+        """内联 data: 图片不是本地文件引用，不应计入 local_image_refs 或被报缺失"""
+        with tempfile.TemporaryDirectory() as td:
+            md_path = os.path.join(td, "out.md")
+            img_dir = os.path.join(td, "images")
+            os.makedirs(img_dir, exist_ok=True)
+            with open(md_path, "w", encoding="utf-8") as f:
+                f.write("![a](data:image/png;base64,iVBORw0KGgo=)\n![b](https://x.test/b.png)\n![c](images/c.png)\n")
+            result = grab.validate_markdown(md_path, img_dir)
+            self.assertEqual(result.image_refs, 3)
+            self.assertEqual(result.local_image_refs, 1)
+            self.assertEqual(result.missing_files, ["images/c.png"])
+
 
 class TestHttpErrorGuidance(unittest.TestCase):
     def _run_http_error_case(self, status_code: int) -> tuple[int, str]:
@@ -1861,6 +1904,27 @@ class TestP1BugFixes(unittest.TestCase):
         self.assertNotIn("页脚", result)
         self.assertIn("深层", result)
 
+    def test_target_extractor_stops_after_container(self):
+        """目标容器闭合后停止解析；容器内解码后的文本仍被重新转义。"""
+        from webpage_to_md import extractors
+
+        html = (
+            '<div id="c"><p>a &lt;b&gt; &amp; c</p></div>'
+            + "<footer>" + "<p>x</p>" * 200 + "</footer>"
+        )
+        fed = []
+        real_feed = extractors._TargetSectionExtractor.feed
+
+        def counting_feed(parser, data):
+            fed.append(len(data))
+            return real_feed(parser, data)
+
+        with mock.patch.object(extractors, "_TARGET_FEED_CHUNK_SIZE", 64), \
+                mock.patch.object(extractors._TargetSectionExtractor, "feed", counting_feed):
+            result = extractors.extract_target_html(html, target_id="c", target_class=None)
+        self.assertEqual(result, '<div id="c"><p>a &lt;b&gt; &amp; c</p></div>')
+        self.assertLess(sum(fed), len(html))
+
     # ── Bug4: <a> 包 <img> 多出垃圾链接 ────────────────────────────────
     def test_bug4_a_wrapping_img_no_bare_link(self):
         """<a> 内仅含图片时不应输出回退裸链接。"""
@@ -2094,6 +2158,41 @@ class TestP2BugFixes(unittest.TestCase):
         finally:
             os.unlink(path)
 
+    def test_cookies_file_keeps_empty_value_and_tabs(self):
+        """cookies.txt 中空 value（含缺失末尾 \\t）与 value 内的 \\t 应按 Netscape 字段语义解析，value 首尾空白被去掉。"""
+        from webpage_to_md.http_client import _parse_cookies_file
+
+        content = (
+            ".example.com\tTRUE\t/\tFALSE\t0\tempty\t\n"
+            ".example.com\tTRUE\t/\tFALSE\t0\tbare\n"
+            ".example.com\tTRUE\t/\tFALSE\t0\ttabbed\ta\tb\r\n"
+            ".example.com\tTRUE\t/\tFALSE\t0\tpadded\tv1 \t \n"
+        )
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8", newline="") as f:
+            f.write(content)
+            path = f.name
+        try:
+            cookies = _parse_cookies_file(path)
+            self.assertEqual(cookies, {"empty": "", "bare": "", "tabbed": "a\tb", "padded": "v1"})
+        finally:
+            os.unlink(path)
+
+    def test_cookie_string_and_header_lines_parsing(self):
+        """--cookie / --header 解析：按首个分隔符切分并去空白，非法 header 报错。"""
+        from webpage_to_md.http_client import _apply_header_lines, _parse_cookie_string
+
+        self.assertEqual(
+            _parse_cookie_string(" a = 1 ; b=x=y;flag; ;c="),
+            {"a": "1", "b": "x=y", "c": ""},
+        )
+        headers = {}
+        _apply_header_lines(headers, ["X-A: 1", "", "X-B:  http://h:8080 "])
+        self.assertEqual(headers, {"X-A": "1", "X-B": "http://h:8080"})
+        with self.assertRaises(ValueError):
+            _apply_header_lines({}, ["no-colon"])
+        with self.assertRaises(ValueError):
+            _apply_header_lines({}, [" : v"])
+
     def test_iter_script_bodies_uses_str_find(self):
         """script 扫描应基于 str.find，正确提取多个 script 正文。"""
         html = (
@@ -2226,6 +2325,30 @@ class TestP2BugFixes(unittest.TestCase):
         self.assertGreater(call_count[0], 1, "429 应被重试")
         self.assertIn("OK", result)
 
+    def test_retry_drains_error_body_for_connection_reuse(self):
+        """可重试的 5xx 响应体应先读完再关闭，使 keep-alive 连接回池供重试复用。"""
+        import requests as req_mod
+        from webpage_to_md import http_client
+
+        fake_resp_503 = mock.MagicMock()
+        fake_resp_503.status_code = 503
+        fake_resp_503.raise_for_status.side_effect = req_mod.exceptions.HTTPError(
+            response=fake_resp_503,
+        )
+        fake_resp_503.iter_content.return_value = iter([b"busy"])
+        fake_resp_ok = mock.MagicMock()
+        fake_resp_ok.headers = {}
+        fake_resp_ok.iter_content.return_value = iter([b"<html>OK</html>"])
+        fake_resp_ok.encoding = "utf-8"
+
+        session = mock.MagicMock()
+        session.get.side_effect = [fake_resp_503, fake_resp_ok]
+        with mock.patch.object(http_client.time, "sleep"):
+            result = http_client.fetch_html(session, "https://x.com/busy", timeout_s=5, retries=2)
+        self.assertIn("OK", result)
+        fake_resp_503.iter_content.assert_called_once()
+        fake_resp_503.close.assert_called_once()
+
     # ── P2-8: redact_url 剥离 userinfo 凭据 ────────────────────────────
     def test_p2_8_redact_strips_userinfo(self):
         """URL 中的 user:password@ 凭据应被脱敏剥离。"""
@@ -2402,5 +2525,427 @@ class TestP2BugFixes(unittest.TestCase):
         self.assertEqual(sniff_ext(xml_svg), ".svg")
 
 
+
+class TestImageDownloadConcurrency(unittest.TestCase):
+    """图片并发下载：结果映射顺序、失败跳过与串行实现保持一致。"""
+
+    @staticmethod
+    def _fake_get_factory(fail_urls=()):
+        def fake_get(img_url, **kw):
+            if img_url in fail_urls:
+                raise requests.exceptions.ConnectionError("boom")
+            resp = mock.MagicMock()
+            resp.status_code = 200
+            resp.headers = {"Content-Type": "image/png"}
+            resp.raise_for_status.return_value = None
+            resp.iter_content.return_value = iter([b"\x89PNG\r\n\x1a\n" + img_url.encode()])
+            return resp
+        return fake_get
+
+    def test_download_images_preserves_order(self):
+        from webpage_to_md import images
+
+        urls = [f"https://img.example.com/{i}.png" for i in range(1, 13)]
+        with tempfile.TemporaryDirectory() as td:
+            assets = os.path.join(td, "a.assets")
+            with mock.patch.object(images, "_safe_image_get", side_effect=self._fake_get_factory()):
+                mapping = images.download_images(
+                    requests.Session(), urls, assets, td, timeout_s=5,
+                    page_url="https://example.com/p", workers=4,
+                )
+            self.assertEqual(list(mapping.keys()), urls)
+            self.assertEqual(mapping[urls[0]], "a.assets/01-1.png")
+            self.assertEqual(len(os.listdir(assets)), 12)
+
+    def test_download_images_reuses_identical_content(self):
+        """不同 URL 指向相同内容时只落盘一份，文件名取编号最小者，与完成顺序无关。"""
+        import time as _time
+
+        from webpage_to_md import images
+
+        urls = [
+            "https://img.example.com/a.png?w=800",
+            "https://img.example.com/b.png",
+            "https://cdn.example.com/a.png?w=400",
+        ]
+
+        def fake_get(img_url, **kw):
+            if img_url == urls[0]:
+                _time.sleep(0.05)  # 编号最小的重复图片最后完成
+            body = b"\x89PNG\r\n\x1a\n" + (b"B" if img_url == urls[1] else b"A")
+            resp = mock.Mock(status_code=200, headers={"Content-Type": "image/png"})
+            resp.iter_content.return_value = iter([body])
+            return resp
+
+        with tempfile.TemporaryDirectory() as td:
+            assets = os.path.join(td, "a.assets")
+            with mock.patch.object(images, "_safe_image_get", side_effect=fake_get):
+                mapping = images.download_images(
+                    requests.Session(), urls, assets, td, timeout_s=5,
+                    page_url="https://example.com/p", workers=3,
+                )
+            self.assertEqual(list(mapping.keys()), urls)
+            self.assertEqual(mapping[urls[0]], "a.assets/01-a.png")
+            self.assertEqual(mapping[urls[2]], "a.assets/01-a.png")
+            self.assertEqual(mapping[urls[1]], "a.assets/02-b.png")
+            self.assertEqual(sorted(os.listdir(assets)), ["01-a.png", "02-b.png"])
+
+    def test_batch_download_names_duplicates_after_all_finish(self):
+        """编号更大的重复图片先完成时，文件名仍取最小编号，且只在全部结束后改名一次。"""
+        import time as _time
+
+        from webpage_to_md import images
+        from webpage_to_md.models import BatchPageResult
+
+        urls = ["https://img.example.com/first.png", "https://cdn.example.com/second.png"]
+
+        def fake_get(img_url, **kw):
+            if img_url == urls[0]:
+                _time.sleep(0.05)  # 编号 1 最后完成
+            resp = mock.Mock(status_code=200, headers={"Content-Type": "image/png"})
+            resp.iter_content.return_value = iter([b"\x89PNG\r\n\x1a\nsame"])
+            return resp
+
+        results = [BatchPageResult(url="https://example.com/p", title="p", md_content="", success=True, image_urls=urls)]
+        with tempfile.TemporaryDirectory() as td:
+            real_replace = images.os.replace
+            with mock.patch.object(images, "_safe_image_get", side_effect=fake_get), \
+                    mock.patch.object(images.os, "replace", side_effect=real_replace) as replace:
+                mapping = images.batch_download_images(requests.Session(), results, td, td, workers=2)
+            self.assertEqual(mapping, {urls[0]: "001-first.png", urls[1]: "001-first.png"})
+            self.assertEqual(os.listdir(td), ["001-first.png"])
+            self.assertEqual(replace.call_count, 1)
+
+    def test_batch_download_progress_counts_submitted_jobs(self):
+        """进度总数只计实际下载的 URL，失败的图片也会推进进度，最后一次回调 done == total。"""
+        from webpage_to_md import images
+        from webpage_to_md.models import BatchPageResult
+
+        urls = ["https://img.example.com/ok.png", "data:image/png;base64,AAAA", "https://img.example.com/bad.png"]
+        results = [BatchPageResult(url="https://example.com/p", title="p", md_content="", success=True, image_urls=urls)]
+        calls = []
+        with tempfile.TemporaryDirectory() as td:
+            with mock.patch.object(images, "_safe_image_get", side_effect=self._fake_get_factory(fail_urls={urls[2]})), \
+                    mock.patch.object(images.time, "sleep"), \
+                    redirect_stderr(io.StringIO()):
+                mapping = images.batch_download_images(
+                    requests.Session(), results, td, td, workers=2,
+                    progress_callback=lambda done, total, url: calls.append((done, total)),
+                )
+        self.assertEqual(list(mapping), [urls[0]])
+        self.assertEqual(calls, [(1, 2), (2, 2)])
+
+    def test_download_images_best_effort_skips_failed(self):
+        from webpage_to_md import images
+
+        urls = ["https://img.example.com/ok.png", "https://img.example.com/bad.png"]
+        with tempfile.TemporaryDirectory() as td:
+            assets = os.path.join(td, "a.assets")
+            fake_get = self._fake_get_factory(fail_urls={urls[1]})
+            with mock.patch.object(images, "_safe_image_get", side_effect=fake_get), \
+                    mock.patch.object(images.time, "sleep"), \
+                    redirect_stderr(io.StringIO()):
+                mapping = images.download_images(
+                    requests.Session(), urls, assets, td, timeout_s=5, best_effort=True,
+                    page_url="https://example.com/p", workers=2,
+                )
+            self.assertEqual(list(mapping.keys()), [urls[0]])
+
+    def test_download_images_caps_per_host_concurrency(self):
+        """单个 host 的在途请求数不超过 _MAX_FETCHES_PER_HOST；多 host 时结果顺序不变。"""
+        import threading
+        import time as _time
+
+        from webpage_to_md import images
+
+        lock = threading.Lock()
+        active = {"n": 0, "peak": 0}
+        base_get = self._fake_get_factory()
+
+        def slow_get(img_url, **kw):
+            if "one.example.com" in img_url:
+                with lock:
+                    active["n"] += 1
+                    active["peak"] = max(active["peak"], active["n"])
+                _time.sleep(0.02)
+                with lock:
+                    active["n"] -= 1
+            return base_get(img_url, **kw)
+
+        urls = [f"https://one.example.com/{i}.png" for i in range(1, 9)]
+        urls += [f"https://two.example.com/{i}.png" for i in range(1, 5)]
+        with tempfile.TemporaryDirectory() as td:
+            assets = os.path.join(td, "a.assets")
+            with mock.patch.object(images, "_MAX_FETCHES_PER_HOST", 2), \
+                    mock.patch.object(images, "_safe_image_get", side_effect=slow_get):
+                mapping = images.download_images(
+                    requests.Session(), urls, assets, td, timeout_s=5,
+                    page_url="https://example.com/p", workers=8,
+                )
+        self.assertEqual(list(mapping.keys()), urls)
+        self.assertLessEqual(active["peak"], 2)
+
+    def test_image_get_keeps_connection_alive(self):
+        """图片请求不再强制 Connection: close，以复用 keep-alive 连接。"""
+        from webpage_to_md import images
+
+        resp = mock.MagicMock()
+        resp.status_code = 200
+        session = mock.MagicMock()
+        session.get.return_value = resp
+        images._safe_image_get(
+            "https://example.com/a.png", "https://example.com/p", session, session,
+            timeout_s=5, referer="https://example.com/p",
+        )
+        sent_headers = session.get.call_args.kwargs["headers"]
+        self.assertNotIn("Connection", sent_headers)
+
+    def test_session_pool_sized_for_img_workers(self):
+        from webpage_to_md.http_client import _create_session
+
+        args = mock.MagicMock(
+            user_agent=None, ua_preset="chrome-win", cookies_file=None, cookie=None,
+            headers=None, header=[], img_workers=64,
+        )
+        session = _create_session(args)
+        adapter = session.get_adapter("https://img.example.com/a.png")
+        self.assertEqual(adapter._pool_maxsize, 64)
+
+    def test_sessions_share_connection_pool(self):
+        """多次创建 Session 复用同一连接池，但 Cookie 不互相串用。"""
+        from webpage_to_md.http_client import _create_session
+
+        def make_args(cookie):
+            return mock.MagicMock(
+                user_agent=None, ua_preset="chrome-win", cookies_file=None, cookie=cookie,
+                headers=None, header=[], img_workers=4,
+            )
+
+        with redirect_stdout(io.StringIO()):
+            s1 = _create_session(make_args("a=1"))
+            s2 = _create_session(make_args(None))
+        self.assertIs(s1.get_adapter("https://x.test/"), s2.get_adapter("https://x.test/"))
+        self.assertEqual(s1.cookies.get("a"), "1")
+        self.assertIsNone(s2.cookies.get("a"))
+
+    def test_cloned_session_shares_connection_pool(self):
+        """批量模式为每个 worker 克隆的 Session 复用原 Session 的 adapter（连接池）。"""
+        base = requests.Session()
+        base.headers["X-Test"] = "1"
+        clone = grab._clone_session(base)
+        self.assertIsNot(clone, base)
+        self.assertIs(clone.get_adapter("https://x.test/"), base.get_adapter("https://x.test/"))
+        self.assertIs(clone.get_adapter("http://x.test/"), base.get_adapter("http://x.test/"))
+        self.assertEqual(clone.headers["X-Test"], "1")
+
+    def test_img_workers_must_be_positive(self):
+        with redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                grab.main(["https://example.com", "--img-workers", "0"])
+
+    def test_safe_image_get_redacts_referer_across_hosts(self):
+        """同域请求带完整 Referer；重定向到第三方后改用干净 session 与脱敏 Referer。"""
+        from webpage_to_md import images
+
+        page = "https://example.com/post?id=1&token=x"
+        redirect = mock.Mock(status_code=302, headers={"Location": "https://cdn.test/a.png"})
+        final = mock.Mock(status_code=200, headers={})
+        session = mock.Mock()
+        session.get.return_value = redirect
+        anon = mock.Mock()
+        anon.get.return_value = final
+
+        r = images._safe_image_get(
+            "https://example.com/a.png", page, session, anon, timeout_s=5, referer=page
+        )
+        self.assertIs(r, final)
+        self.assertEqual(session.get.call_args.kwargs["headers"], {"Referer": page})
+        self.assertEqual(anon.get.call_args.kwargs["headers"], {"Referer": "https://example.com/post"})
+
+    def test_fetch_image_drains_error_body(self):
+        """图片 HTTP 错误响应体应先读完再关闭，使 keep-alive 连接回池复用。"""
+        import requests as req_mod
+        from webpage_to_md import images
+
+        resp = mock.MagicMock()
+        resp.status_code = 404
+        resp.raise_for_status.side_effect = req_mod.exceptions.HTTPError(response=resp)
+        resp.iter_content.return_value = iter([b"not found"])
+        session = mock.MagicMock()
+        session.get.return_value = resp
+        with self.assertRaises(req_mod.exceptions.HTTPError):
+            images._fetch_image(
+                "https://example.com/a.png", page_url="https://example.com/p",
+                session=session, anon_session=session, timeout_s=5, retries=1,
+                referer="https://example.com/p", redact_urls=True, max_bytes=None,
+                assets_dir=tempfile.gettempdir(),
+            )
+        resp.iter_content.assert_called_once()
+        resp.close.assert_called_once()
+
+    @staticmethod
+    def _fetch_to(assets_dir, chunks, max_bytes=None):
+        from webpage_to_md import images
+
+        resp = mock.Mock(status_code=200, headers={"Content-Type": "application/octet-stream"})
+        resp.iter_content.return_value = iter(chunks)
+        session = mock.Mock()
+        session.get.return_value = resp
+        return images._fetch_image(
+            "https://example.com/a", page_url="https://example.com/p",
+            session=session, anon_session=session, timeout_s=5, retries=1,
+            referer="https://example.com/p", redact_urls=True, max_bytes=max_bytes,
+            assets_dir=assets_dir,
+        )
+
+    def test_fetch_image_streams_body_to_part_file(self):
+        """worker 把响应体按块写入 assets 目录下的 .part 文件，返回摘要与首块嗅探出的扩展名。"""
+        import hashlib
+
+        chunks = [b"\x89PNG\r\n\x1a\n" + b"\0" * 8, b"x" * 100, b"", b"y" * 50]
+        body = b"".join(chunks)
+        with tempfile.TemporaryDirectory() as td:
+            tmp_path, content_type, digest, sniffed = self._fetch_to(td, chunks)
+            self.assertEqual(os.path.dirname(tmp_path), td)
+            self.assertTrue(tmp_path.endswith(".part"))
+            with open(tmp_path, "rb") as f:
+                self.assertEqual(f.read(), body)
+        self.assertEqual(content_type, "application/octet-stream")
+        self.assertEqual(digest, hashlib.blake2b(body, digest_size=16).digest())
+        self.assertEqual(sniffed, ".png")
+
+    @unittest.skipIf(os.name == "nt", "POSIX 文件权限")
+    def test_downloaded_image_gets_regular_file_mode(self):
+        """落盘图片权限与普通新建文件一致（0666 & ~umask），而非 mkstemp 的 0600。"""
+        import stat
+
+        from webpage_to_md import images
+
+        old_mask = os.umask(0o022)
+        try:
+            with tempfile.TemporaryDirectory() as td:
+                with mock.patch.object(images, "_IMAGE_FILE_MODE", 0o644), \
+                        mock.patch.object(images, "_safe_image_get", side_effect=self._fake_get_factory()):
+                    mapping = images.download_images(
+                        requests.Session(), ["https://img.example.com/a.png"], td, td, timeout_s=5,
+                        page_url="https://example.com/p", workers=1,
+                    )
+                mode = stat.S_IMODE(os.stat(os.path.join(td, mapping["https://img.example.com/a.png"])).st_mode)
+        finally:
+            os.umask(old_mask)
+        self.assertEqual(mode, 0o644)
+        self.assertEqual(images._IMAGE_FILE_MODE, 0o666 & ~old_mask)
+
+    def test_fetch_image_removes_part_file_on_failure(self):
+        """超限或空响应体时删除临时 .part 文件并抛出。"""
+        with tempfile.TemporaryDirectory() as td:
+            with self.assertRaisesRegex(RuntimeError, "图片过大"):
+                self._fetch_to(td, [b"a" * 10, b"b" * 10], max_bytes=15)
+            with self.assertRaisesRegex(RuntimeError, "空响应体"):
+                self._fetch_to(td, [b""])
+            self.assertEqual(os.listdir(td), [])
+
+    def test_download_images_leaves_no_part_files_on_abort(self):
+        """非 best_effort 模式下某张图片失败时，其余已下载的临时文件也被清理。"""
+        from webpage_to_md import images
+
+        urls = [f"https://img.example.com/{i}.png" for i in range(1, 6)]
+        fake_get = self._fake_get_factory(fail_urls={urls[0]})
+        with tempfile.TemporaryDirectory() as td:
+            with mock.patch.object(images, "_safe_image_get", side_effect=fake_get), \
+                    mock.patch.object(images.time, "sleep"):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    images.download_images(
+                        requests.Session(), urls, td, td, timeout_s=5,
+                        page_url="https://example.com/p", workers=4,
+                    )
+            self.assertEqual([n for n in os.listdir(td) if n.endswith(".part")], [])
+
+
+class TestExtractMainHtml(unittest.TestCase):
+    """extract_main_html：单次扫描选出最长的 article/main/body。"""
+
+    def test_prefers_longest_article(self):
+        from webpage_to_md.extractors import extract_main_html
+
+        page = "<BODY><main>m</main><Article>short</article><article>\nlonger text</ARTICLE></body>"
+        self.assertEqual(extract_main_html(page), "\nlonger text")
+
+    def test_nested_article_kept_whole(self):
+        from webpage_to_md.extractors import extract_main_html
+
+        page = "<body><article><article>in</article>tail</article></body>"
+        self.assertEqual(extract_main_html(page), "<article>in</article>tail")
+
+    def test_ignores_tags_inside_script(self):
+        from webpage_to_md.extractors import extract_main_html
+
+        page = '<body><script>var s = "<article>x</article>";</script>hi</body>'
+        self.assertEqual(extract_main_html(page), '<script>var s = "<article>x</article>";</script>hi')
+
+    def test_falls_back_to_page(self):
+        from webpage_to_md.extractors import extract_main_html
+
+        self.assertEqual(extract_main_html("<p>none</p>"), "<p>none</p>")
+        self.assertEqual(extract_main_html("<body></body>"), "<body></body>")
+
+    def test_unclosed_raw_text_falls_back_to_regex(self):
+        """未闭合的 <style>/<script>/<!-- 会吞掉页面剩余部分，此时回退到正则定位 body。"""
+        from webpage_to_md.extractors import extract_main_html
+
+        page = "<html><head><title>t</title><style>p{}</head><body><h1>T</h1><p>hello world text</p></body></html>"
+        self.assertEqual(extract_main_html(page), "<h1>T</h1><p>hello world text</p>")
+        page = "<head><script>var a = 1;</head><body><p>x</p></body>"
+        self.assertEqual(extract_main_html(page), "<p>x</p>")
+        page = "<head><!-- note</head><body><article>a</article></body>"
+        self.assertEqual(extract_main_html(page), "a")
+
+    def test_section_indexer_tracks_offsets_across_chunks(self):
+        from webpage_to_md.extractors import _SectionIndexer
+
+        page = '<body>\n<article>\n<img src="/a.png"><p>x</p>\n</article></body>'
+        indexer = _SectionIndexer()
+        for i in range(0, len(page), 5):
+            indexer.feed(page[i : i + 5])
+        indexer.close()
+        start, end = indexer.spans["article"][0]
+        self.assertEqual(page[start:end], '\n<img src="/a.png"><p>x</p>\n')
+
+    def test_escape_text_matches_html_escape(self):
+        """_escape_text 与 html.escape(quote=False) 结果一致；无需转义时返回原串。"""
+        import html
+
+        from webpage_to_md.markdown_conv import _escape_text
+
+        for data in ["plain 文本", "a < b && c > d", "&amp;", 'say "hi"', ""]:
+            self.assertEqual(_escape_text(data), html.escape(data, quote=False))
+        clean = "no special chars here"
+        self.assertIs(_escape_text(clean), clean)
+
+    def test_html_text_len_collapses_whitespace(self):
+        """正文长度按节点去首尾、折叠空白（含 Unicode 空白）计数，跳过 script/style。"""
+        from webpage_to_md.extractors import html_text_len
+
+        html = "<p>  a \t\n b\u3000\u3000c </p><script>var x = 1;</script><p>\u00a0</p><p>dd</p>"
+        self.assertEqual(html_text_len(html), len("a b c") + len("dd"))
+
+    def test_article_scanner_matches_separate_passes(self):
+        """ArticleScanner 一次解析的结果与 ImageURLCollector/extract_h1/html_text_len 一致。"""
+        from webpage_to_md.extractors import ArticleScanner, ImageURLCollector, extract_h1, html_text_len
+
+        html = (
+            '<script>var t = "<h1>no</h1>";</script><h1> Hello <b>W&amp;rld</b> </h1>'
+            '<p>body  text</p><img src="/a.png"><h1>second</h1><style>p{}</style>'
+        )
+        scanner = ArticleScanner(base_url="https://example.com/")
+        scanner.feed(html)
+        collector = ImageURLCollector(base_url="https://example.com/")
+        collector.feed(html)
+        self.assertEqual(scanner.image_urls, collector.image_urls)
+        self.assertEqual(scanner.h1, extract_h1(html))
+        self.assertEqual(scanner.h1, "Hello W&rld")
+        self.assertEqual(scanner.text_len, html_text_len(html))
+
+
 if __name__ == "__main__":
     unittest.main()